@@ -0,0 +1,150 @@
+from typing import List, Optional
+
+from testing2 import Library, Transaction
+
+COLUMNS = "transaction_id, book_isbn, member_id, borrow_date, return_date, fine"
+
+# Closed transactions older than a cutoff are moved out of the hot
+# `transactions` table into one table per borrow year (transactions_2019, ...).
+# With archive_db set, the yearly tables live in a separate database file that
+# is ATTACHed as `archive`, keeping library.db itself small.
+class TransactionArchive:
+    def __init__(self, library: Library, archive_db: Optional[str] = None):
+        self.library = library
+        self.conn = library.conn
+        self.cursor = self.conn.cursor()
+        self.schema = "main"
+        if archive_db:
+            self.cursor.execute("ATTACH DATABASE ? AS archive", (archive_db,))
+            self.schema = "archive"
+        self.initialize_database()
+        # Keep new transaction IDs from reusing archived ones
+        for table in self.archive_tables():
+            self.cursor.execute(f"SELECT MAX(CAST(SUBSTR(transaction_id, 2) AS INTEGER)) FROM {table}")
+            highest = self.cursor.fetchone()[0] or 0
+            library.last_transaction_number = max(library.last_transaction_number, highest)
+
+    def initialize_database(self):
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transactions_member ON transactions (member_id)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transactions_book ON transactions (book_isbn)
+        ''')
+        self.conn.commit()
+
+    def archive_tables(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[str]:
+        self.cursor.execute(f'''
+            SELECT name FROM {self.schema}.sqlite_master
+            WHERE type = 'table' AND name GLOB 'transactions_[0-9][0-9][0-9][0-9]'
+            ORDER BY name
+        ''')
+        tables = []
+        for (name,) in self.cursor.fetchall():
+            year = int(name[-4:])
+            if start_year is not None and year < start_year:
+                continue
+            if end_year is not None and year > end_year:
+                continue
+            tables.append(f"{self.schema}.{name}")
+        return tables
+
+    def _create_year_table(self, year: int) -> str:
+        table = f"{self.schema}.transactions_{year}"
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                transaction_id TEXT PRIMARY KEY,
+                book_isbn TEXT,
+                member_id TEXT,
+                borrow_date TEXT,
+                return_date TEXT,
+                fine REAL
+            )
+        ''')
+        self.cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS {self.schema}.idx_transactions_{year}_member
+            ON transactions_{year} (member_id)
+        ''')
+        self.cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS {self.schema}.idx_transactions_{year}_book
+            ON transactions_{year} (book_isbn)
+        ''')
+        return table
+
+    def archive(self, cutoff: str) -> int:
+        # Only returned loans are moved; open loans always stay hot
+        self.cursor.execute('''
+            SELECT DISTINCT SUBSTR(borrow_date, 1, 4) FROM transactions
+            WHERE return_date IS NOT NULL AND return_date < ?
+        ''', (cutoff,))
+        years = [int(row[0]) for row in self.cursor.fetchall()]
+        moved = 0
+        try:
+            for year in years:
+                table = self._create_year_table(year)
+                self.cursor.execute(f'''
+                    INSERT OR REPLACE INTO {table} ({COLUMNS})
+                    SELECT {COLUMNS} FROM transactions
+                    WHERE return_date IS NOT NULL AND return_date < ? AND SUBSTR(borrow_date, 1, 4) = ?
+                ''', (cutoff, f"{year:04d}"))
+                moved += self.cursor.rowcount
+            self.cursor.execute('''
+                SELECT transaction_id FROM transactions
+                WHERE return_date IS NOT NULL AND return_date < ?
+            ''', (cutoff,))
+            archived_ids = [row[0] for row in self.cursor.fetchall()]
+            self.cursor.execute('''
+                DELETE FROM transactions WHERE return_date IS NOT NULL AND return_date < ?
+            ''', (cutoff,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        for transaction_id in archived_ids:
+            self.library.transactions.pop(transaction_id, None)
+        print(f"\nArchived {moved} transactions returned before {cutoff}")
+        return moved
+
+    def _query(self, where: str, params: tuple, include_archive: bool,
+               start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[Transaction]:
+        tables = ["main.transactions"]
+        if include_archive:
+            tables += self.archive_tables(start_year, end_year)
+        sql = " UNION ALL ".join(f"SELECT {COLUMNS} FROM {table} WHERE {where}" for table in tables)
+        self.cursor.execute(f"{sql} ORDER BY borrow_date, transaction_id", params * len(tables))
+        transactions = []
+        for row in self.cursor.fetchall():
+            transaction = Transaction(row[0], row[1], row[2], row[3])
+            transaction.return_date = row[4]
+            transaction.fine = row[5]
+            transactions.append(transaction)
+        return transactions
+
+    def get_transaction(self, transaction_id: str, include_archive: bool = True) -> Optional[Transaction]:
+        if transaction_id in self.library.transactions:
+            return self.library.transactions[transaction_id]
+        found = self._query("transaction_id = ?", (transaction_id,), include_archive)
+        return found[0] if found else None
+
+    def member_history(self, member_id: str, include_archive: bool = False) -> List[Transaction]:
+        return self._query("member_id = ?", (member_id,), include_archive)
+
+    def book_history(self, isbn: str, include_archive: bool = False) -> List[Transaction]:
+        return self._query("book_isbn = ?", (isbn,), include_archive)
+
+    def transactions_between(self, start_date: str, end_date: str,
+                             include_archive: bool = True) -> List[Transaction]:
+        # Yearly tables outside the borrow-date range are skipped entirely
+        return self._query("borrow_date >= ? AND borrow_date < ?", (start_date, end_date),
+                           include_archive, int(start_date[:4]), int(end_date[:4]))
+
+    def archive_size(self) -> int:
+        total = 0
+        for table in self.archive_tables():
+            self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            total += self.cursor.fetchone()[0]
+        return total
+
+    def detach(self):
+        if self.schema == "archive":
+            self.cursor.execute("DETACH DATABASE archive")
@@ -0,0 +1,135 @@
+import sqlite3
+import datetime
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, List
+
+# Online backup copies `pages_per_step` pages at a time and sleeps between
+# steps, so the desk can keep committing while a copy is taken. A commit from
+# another connection between steps makes SQLite restart the copy. Larger
+# steps mean fewer such gaps but hold the source's read lock for longer;
+# 1024 pages is 4 MiB at the default page size. `bench` times other sizes.
+def backup_database(source: sqlite3.Connection, dest_path: str,
+                    pages_per_step: int = 1024, sleep: float = 0.005, verbose: bool = True) -> Dict[str, float]:
+    stats = {"steps": 0, "pages": 0}
+
+    def progress(status: int, remaining: int, total: int):
+        stats["steps"] += 1
+        stats["pages"] = total
+        if verbose and total:
+            print(f"\rBackup: {total - remaining}/{total} pages", end="", flush=True)
+
+    start = time.perf_counter()
+    dest = sqlite3.connect(dest_path)
+    try:
+        source.backup(dest, pages=pages_per_step, progress=progress, sleep=sleep)
+    finally:
+        dest.close()
+    stats["seconds"] = time.perf_counter() - start
+    stats["bytes"] = os.path.getsize(dest_path)
+    if verbose:
+        print(f"\nBackup written to {dest_path} ({stats['bytes'] / 1e6:.1f} MB "
+              f"in {stats['seconds']:.2f}s)")
+    return stats
+
+def list_tables(conn: sqlite3.Connection) -> List[str]:
+    cursor = conn.execute('''
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        ORDER BY name
+    ''')
+    return [row[0] for row in cursor.fetchall()]
+
+# All tables are read inside a single read transaction on a dedicated
+# read-only connection, so the export is one consistent snapshot. Rows are
+# streamed from the cursor in batches and never held in memory as a whole.
+def export_snapshot(db_name: str, out_dir: str, fmt: str = "jsonl",
+                    batch_size: int = 10000, verbose: bool = True) -> Dict[str, int]:
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True, isolation_level=None)
+    counts: Dict[str, int] = {}
+    start = time.perf_counter()
+    try:
+        conn.execute("BEGIN")
+        for table in list_tables(conn):
+            cursor = conn.execute(f'SELECT * FROM "{table}"')
+            columns = [column[0] for column in cursor.description]
+            path = os.path.join(out_dir, f"{table}.{fmt}")
+            rows = 0
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                if fmt == "csv":
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    if fmt == "csv":
+                        writer.writerows(batch)
+                    else:
+                        f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in batch)
+                    rows += len(batch)
+            counts[table] = rows
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    if verbose:
+        total = sum(counts.values())
+        print(f"Exported {total} rows from {len(counts)} tables to {out_dir} "
+              f"in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return counts
+
+def benchmark(db_name: str, work_dir: str, pages_per_step: int, sleep: float):
+    size = os.path.getsize(db_name)
+    print(f"Benchmarking against {db_name} ({size / 1e6:.1f} MB)")
+    source = sqlite3.connect(db_name)
+    try:
+        stats = backup_database(source, os.path.join(work_dir, "bench_backup.db"),
+                                pages_per_step, sleep, verbose=False)
+    finally:
+        source.close()
+    print(f"Backup: {stats['bytes'] / 1e6 / stats['seconds']:.1f} MB/s, {stats['steps']} steps")
+    for fmt in ("jsonl", "csv"):
+        start = time.perf_counter()
+        counts = export_snapshot(db_name, os.path.join(work_dir, f"bench_{fmt}"), fmt, verbose=False)
+        elapsed = time.perf_counter() - start
+        print(f"Export {fmt}: {sum(counts.values()) / elapsed:,.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up or export a library database")
+    parser.add_argument("--db", default="library.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backup = sub.add_parser("backup", help="Online page-stepped backup")
+    backup.add_argument("dest", nargs="?")
+    backup.add_argument("--pages", type=int, default=1024)
+    backup.add_argument("--sleep", type=float, default=0.005)
+    export = sub.add_parser("export", help="Streaming snapshot export of all tables")
+    export.add_argument("out_dir")
+    export.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    bench = sub.add_parser("bench", help="Measure backup and export throughput")
+    bench.add_argument("work_dir")
+    bench.add_argument("--pages", type=int, default=1024)
+    bench.add_argument("--sleep", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        dest = args.dest or f"library-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+        source = sqlite3.connect(args.db)
+        try:
+            backup_database(source, dest, args.pages, args.sleep)
+        finally:
+            source.close()
+    elif args.command == "export":
+        export_snapshot(args.db, args.out_dir, args.format)
+    else:
+        os.makedirs(args.work_dir, exist_ok=True)
+        benchmark(args.db, args.work_dir, args.pages, args.sleep)
+
+if __name__ == "__main__":
+    main()
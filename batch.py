@@ -0,0 +1,170 @@
+import sqlite3
+import argparse
+import contextlib
+import io
+import json
+import shlex
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from testing2 import Library
+
+# Argument order for each replayable command, as accepted by Library
+COMMANDS = {
+    "add_book": ("isbn", "title", "author", "year", "copies"),
+    "add_member": ("member_id", "name", "email"),
+    "borrow_book": ("member_id", "isbn"),
+    "return_book": ("transaction_id",),
+    "list_books": (),
+    "list_members": (),
+    "list_transactions": (),
+    "generate_report": (),
+}
+INTEGER_ARGS = {"year", "copies"}
+
+# Library commits after every operation; during a replay that fsync dominates.
+# This stands in for the connection and only commits every `batch_size` calls.
+class BatchingConnection:
+    def __init__(self, conn: sqlite3.Connection, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pending = 0
+        self.commits = 0
+
+    def commit(self):
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self.conn.commit()
+        self.pending = 0
+        self.commits += 1
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def parse_line(line: str, line_number: int) -> Tuple[str, List]:
+    line = line.strip()
+    if line.startswith("{"):
+        record = json.loads(line)
+        command = record.get("op") or record.get("command")
+        if command not in COMMANDS:
+            raise ValueError(f"line {line_number}: unknown command {command!r}")
+        if "args" in record:
+            args = list(record["args"])
+        else:
+            args = [record[name] for name in COMMANDS[command]]
+    else:
+        parts = shlex.split(line)
+        command, args = parts[0], parts[1:]
+        if command not in COMMANDS:
+            raise ValueError(f"line {line_number}: unknown command {command!r}")
+    names = COMMANDS[command]
+    if len(args) != len(names):
+        raise ValueError(f"line {line_number}: {command} expects {len(names)} arguments, got {len(args)}")
+    args = [int(value) if name in INTEGER_ARGS else value for name, value in zip(names, args)]
+    return command, args
+
+def read_lines(stream) -> Iterator[Tuple[int, str]]:
+    for line_number, line in enumerate(stream, 1):
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            yield line_number, stripped
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def run_batch(library: Library, stream, batch_size: int = 1000, verbose: bool = False,
+              stop_on_error: bool = False) -> Dict[str, Dict[str, float]]:
+    batching = BatchingConnection(library.conn, batch_size)
+    library.conn = batching
+    latencies: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    errors = 0
+    sink = sys.stdout if verbose else io.StringIO()
+    start = time.perf_counter()
+    try:
+        for line_number, line in read_lines(stream):
+            command = line.split(None, 1)[0]
+            try:
+                command, args = parse_line(line, line_number)
+                method = getattr(library, command)
+                began = time.perf_counter()
+                with contextlib.redirect_stdout(sink):
+                    result = method(*args)
+            except Exception as e:
+                errors += 1
+                print(f"Line {line_number}: {command} failed: {e}", file=sys.stderr)
+                if stop_on_error:
+                    raise
+                continue
+            latencies.setdefault(command, []).append(time.perf_counter() - began)
+            if result is False:
+                failures[command] = failures.get(command, 0) + 1
+            if not verbose:
+                sink.seek(0)
+                sink.truncate()
+    finally:
+        batching.flush()
+        library.conn = batching.conn
+    elapsed = time.perf_counter() - start
+
+    summary: Dict[str, Dict[str, float]] = {}
+    for command, values in latencies.items():
+        values.sort()
+        summary[command] = {
+            "count": len(values),
+            "rejected": failures.get(command, 0),
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+    total = sum(len(values) for values in latencies.values())
+    summary["total"] = {"count": total, "errors": errors, "seconds": elapsed,
+                        "ops_per_sec": total / elapsed if elapsed else 0.0, "commits": batching.commits}
+    return summary
+
+def print_summary(summary: Dict[str, Dict[str, float]]):
+    total = summary["total"]
+    print(f"\nExecuted {total['count']} commands in {total['seconds']:.2f}s "
+          f"({total['ops_per_sec']:,.0f} ops/s, {total['commits']} commits, {total['errors']} errors)")
+    print(f"{'command':<18}{'count':>9}{'rejected':>10}{'mean ms':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for command, stats in sorted(summary.items()):
+        if command == "total":
+            continue
+        print(f"{command:<18}{stats['count']:>9}{stats['rejected']:>10}{stats['mean_ms']:>10.3f}"
+              f"{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}{stats['max_ms']:>9.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Library commands from a script or JSONL stream")
+    parser.add_argument("script", help="Command script or JSONL file, or - for stdin")
+    parser.add_argument("--db", default="library.db")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Operations per commit")
+    parser.add_argument("--verbose", action="store_true", help="Show per-operation output")
+    parser.add_argument("--stop-on-error", action="store_true")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    library = Library(args.db)
+    try:
+        if args.script == "-":
+            summary = run_batch(library, sys.stdin, args.batch_size, args.verbose, args.stop_on_error)
+        else:
+            with open(args.script, "r", encoding="utf-8") as f:
+                summary = run_batch(library, f, args.batch_size, args.verbose, args.stop_on_error)
+    finally:
+        library.close()
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sqlite3
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import time
+from typing import Dict, List
+
+from testing2 import Library
+from datagen import LibraryGenerator
+
+# Row counts are transaction rows; books and members scale with them.
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+def timed(results: Dict[str, float], name: str, func, *args):
+    # Library prints on every call; keep that out of both the timing and the terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        value = func(*args)
+        results[name] = time.perf_counter() - start
+    return value
+
+def run_size(rows: int, work_dir: str, seed: int, operations: int) -> Dict[str, float]:
+    db_name = os.path.join(work_dir, f"bench_{rows}.db")
+    generator = LibraryGenerator(seed)
+    stats = generator.generate(db_name, books=max(100, rows // 10), members=max(50, rows // 20),
+                               transactions=rows, overwrite=True)
+    results: Dict[str, float] = {"rows": rows, "generate": stats["seconds"],
+                                 "db_bytes": os.path.getsize(db_name)}
+
+    library = timed(results, "startup", Library, db_name)
+    rng = random.Random(seed)
+    member_ids = list(library.members)
+    isbns = [isbn for isbn, book in library.books.items() if book.available_copies > 0]
+
+    def borrow_many():
+        done = []
+        for _ in range(operations):
+            member_id = rng.choice(member_ids)
+            if library.borrow_book(member_id, rng.choice(isbns)):
+                done.append(f"T{library.last_transaction_number:05d}")
+        return done
+
+    def return_many(transaction_ids: List[str]):
+        for transaction_id in transaction_ids:
+            library.return_book(transaction_id)
+
+    borrowed = timed(results, "borrow", borrow_many)
+    results["borrow_per_op"] = results["borrow"] / operations
+    timed(results, "return", return_many, borrowed)
+    results["return_per_op"] = results["return"] / max(1, len(borrowed))
+    timed(results, "list_books", library.list_books)
+    timed(results, "list_transactions", library.list_transactions)
+    timed(results, "generate_report", library.generate_report)
+    timed(results, "shutdown", library.close)
+    os.remove(db_name)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Library operations at increasing data sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--work-dir", default=".")
+    parser.add_argument("--operations", type=int, default=1000, help="Borrows per size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args()
+
+    run = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "results": [],
+    }
+    for rows in args.sizes:
+        results = run_size(rows, args.work_dir, args.seed, args.operations)
+        run["results"].append(results)
+        print(f"{rows:>11,} rows: startup {results['startup']:.2f}s, "
+              f"borrow {results['borrow_per_op'] * 1e3:.3f}ms/op, return {results['return_per_op'] * 1e3:.3f}ms/op, "
+              f"list {results['list_books']:.2f}s, report {results['generate_report']:.3f}s, "
+              f"shutdown {results['shutdown']:.2f}s")
+
+    # Runs accumulate in one file so regressions show up against earlier entries
+    history = []
+    if os.path.exists(args.out):
+        with open(args.out) as f:
+            history = json.load(f)
+    history.append(run)
+    with open(args.out, "w") as f:
+        json.dump(history, f, indent=2)
+    print(f"Results appended to {args.out}")
+
+if __name__ == "__main__":
+    main()
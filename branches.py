@@ -0,0 +1,163 @@
+import sqlite3
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from testing2 import Library, Book
+
+# One Library (and one SQLite file) per branch, so desk traffic at one branch
+# never contends for another branch's write lock. Single-branch operations
+# are routed to that branch's shard; searches and reports fan out to every
+# shard on worker threads, each with its own read-only connection, since
+# SQLite releases the GIL while a query runs.
+class BranchedLibrary:
+    def __init__(self, branches: List[str], directory: str = ".", max_workers: Optional[int] = None):
+        self.directory = directory
+        self.shards: Dict[str, Library] = {}
+        for branch in branches:
+            if not re.match(r"^[A-Za-z0-9_]+$", branch):
+                raise ValueError(f"Invalid branch name: {branch}")
+            self.shards[branch] = Library(self.shard_path(branch))
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or len(self.shards))
+
+    def shard_path(self, branch: str) -> str:
+        return os.path.join(self.directory, f"library_{branch}.db")
+
+    def shard(self, branch: str) -> Library:
+        if branch not in self.shards:
+            raise KeyError(f"Unknown branch: {branch}")
+        return self.shards[branch]
+
+    def add_book(self, branch: str, isbn: str, title: str, author: str, year: int, copies: int) -> bool:
+        return self.shard(branch).add_book(isbn, title, author, year, copies)
+
+    def add_member(self, branch: str, member_id: str, name: str, email: str) -> bool:
+        return self.shard(branch).add_member(member_id, name, email)
+
+    def borrow_book(self, branch: str, member_id: str, isbn: str) -> bool:
+        return self.shard(branch).borrow_book(member_id, isbn)
+
+    def return_book(self, branch: str, transaction_id: str) -> bool:
+        return self.shard(branch).return_book(transaction_id)
+
+    def transfer_copies(self, isbn: str, source: str, dest: str, count: int = 1) -> bool:
+        source_library = self.shard(source)
+        dest_library = self.shard(dest)
+        book = source_library.books.get(isbn)
+        if book is None:
+            print("\nBook not found!")
+            return False
+        if count <= 0 or book.available_copies < count:
+            print("\nNot enough available copies to transfer!")
+            return False
+
+        # Both files are written in one transaction on the source connection,
+        # so a crash can never leave the copies in both branches or neither.
+        conn = source_library.conn
+        conn.commit()
+        conn.execute("ATTACH DATABASE ? AS dest", (self.shard_path(dest),))
+        try:
+            conn.execute('''
+                UPDATE books SET copies = copies - ?, available_copies = available_copies - ?
+                WHERE isbn = ?
+            ''', (count, count, isbn))
+            conn.execute('''
+                INSERT INTO dest.books (isbn, title, author, year, copies, available_copies)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(isbn) DO UPDATE SET copies = copies + excluded.copies,
+                    available_copies = available_copies + excluded.available_copies
+            ''', (isbn, book.title, book.author, book.year, count, count))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE dest")
+
+        book.copies -= count
+        book.available_copies -= count
+        if isbn in dest_library.books:
+            dest_library.books[isbn].copies += count
+            dest_library.books[isbn].available_copies += count
+        else:
+            moved = Book(isbn, book.title, book.author, book.year, count)
+            dest_library.books[isbn] = moved
+        print(f"\nTransferred {count} copies of '{book.title}' from {source} to {dest}")
+        return True
+
+    def _fan_out(self, query) -> Dict[str, object]:
+        def run(branch: str):
+            conn = sqlite3.connect(f"file:{self.shard_path(branch)}?mode=ro", uri=True)
+            try:
+                return query(conn)
+            finally:
+                conn.close()
+        futures = {branch: self.pool.submit(run, branch) for branch in self.shards}
+        return {branch: future.result() for branch, future in futures.items()}
+
+    def search_books(self, text: str, limit: int = 50) -> List[Tuple[str, Book]]:
+        pattern = f"%{text}%"
+
+        def query(conn: sqlite3.Connection):
+            return conn.execute('''
+                SELECT isbn, title, author, year, copies,
+                       copies - (SELECT COUNT(*) FROM transactions
+                                 WHERE book_isbn = books.isbn AND return_date IS NULL)
+                FROM books
+                WHERE title LIKE ? OR author LIKE ? OR isbn = ?
+                ORDER BY title LIMIT ?
+            ''', (pattern, pattern, text, limit)).fetchall()
+
+        results = []
+        for branch, rows in self._fan_out(query).items():
+            for row in rows:
+                book = Book(row[0], row[1], row[2], row[3], row[4])
+                book.available_copies = row[5]
+                results.append((branch, book))
+        results.sort(key=lambda result: (result[1].title, result[0]))
+        return results[:limit]
+
+    def find_copies(self, isbn: str) -> Dict[str, int]:
+        def query(conn: sqlite3.Connection):
+            row = conn.execute('''
+                SELECT copies - (SELECT COUNT(*) FROM transactions WHERE book_isbn = ? AND return_date IS NULL)
+                FROM books WHERE isbn = ?
+            ''', (isbn, isbn)).fetchone()
+            return row[0] if row else 0
+        return {branch: available for branch, available in self._fan_out(query).items() if available}
+
+    def report_totals(self) -> Dict[str, Dict[str, float]]:
+        def query(conn: sqlite3.Connection):
+            books, copies = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(copies), 0) FROM books
+            ''').fetchone()
+            members, fines = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(fines), 0) FROM members
+            ''').fetchone()
+            active = conn.execute('''
+                SELECT COUNT(*) FROM transactions WHERE return_date IS NULL
+            ''').fetchone()[0]
+            return {"books": books, "copies": copies, "available": copies - active,
+                    "members": members, "fines": fines, "active": active}
+        return self._fan_out(query)
+
+    def generate_report(self):
+        per_branch = self.report_totals()
+        totals = {key: sum(stats[key] for stats in per_branch.values())
+                  for key in ("books", "copies", "available", "members", "fines", "active")}
+        print("\nLibrary Report (all branches):")
+        print(f"Total Books: {totals['books']}")
+        print(f"Total Copies: {totals['copies']}")
+        print(f"Available Copies: {totals['available']}")
+        print(f"Total Members: {totals['members']}")
+        print(f"Total Fines Outstanding: ${totals['fines']:.2f}")
+        print(f"Active Borrows: {totals['active']}")
+        for branch, stats in per_branch.items():
+            print(f"- {branch}: {stats['books']} books, {stats['available']}/{stats['copies']} copies available, "
+                  f"{stats['active']} active borrows")
+
+    def close(self):
+        self.pool.shutdown()
+        for library in self.shards.values():
+            library.close()
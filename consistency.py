@@ -0,0 +1,137 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+from testing2 import Library
+from datagen import LibraryGenerator
+
+class ConsistencyReport:
+    def __init__(self):
+        self.books: List[Tuple[str, int, int]] = []  # (isbn, found, expected)
+        self.members: List[Tuple[str, List[str], List[str]]] = []  # (member_id, found, expected)
+        self.seconds = 0.0
+
+    def ok(self) -> bool:
+        return not self.books and not self.members
+
+    def __str__(self):
+        if self.ok():
+            return f"Counters consistent ({self.seconds * 1e3:.1f}ms)"
+        lines = [f"{len(self.books)} book counter(s) and {len(self.members)} member list(s) "
+                 f"out of step ({self.seconds * 1e3:.1f}ms)"]
+        for isbn, found, expected in self.books[:20]:
+            lines.append(f"- book {isbn}: available_copies {found}, expected {expected}")
+        for member_id, found, expected in self.members[:20]:
+            lines.append(f"- member {member_id}: borrowed {found}, expected {expected}")
+        hidden = len(self.books) + len(self.members) - min(20, len(self.books)) - min(20, len(self.members))
+        if hidden:
+            lines.append(f"  ... and {hidden} more")
+        return "\n".join(lines)
+
+# Checks the stored available_copies of every book, and each member's
+# in-memory borrowed-book list, against the open loans in the transactions
+# table. Each side is one grouped query: open loans are counted through a
+# partial index, and only drifted rows come back to Python for books.
+class ConsistencyChecker:
+    def __init__(self, library: Library):
+        self.library = library
+
+    def check(self) -> ConsistencyReport:
+        start = time.perf_counter()
+        report = ConsistencyReport()
+        store = self.library.store
+        # Book objects are loaded from these same rows, so the stored value is what gets checked
+        for isbn, found, expected in store.availability_mismatches():
+            report.books.append((isbn, found, expected))
+
+        expected_lists: Dict[str, List[str]] = {}
+        for member_id, isbns in store.open_loans_by_member():
+            expected_lists[member_id] = sorted(isbns.split(" "))
+        for member_id, member in self.library.members.items():
+            expected = expected_lists.get(member_id, [])
+            if (member.borrowed_books or expected) and sorted(member.borrowed_books) != expected:
+                report.members.append((member_id, list(member.borrowed_books), expected))
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def repair(self, report: ConsistencyReport) -> int:
+        # All fixes land in one transaction, so a crash leaves the old state
+        fixes: Dict[str, int] = {isbn: expected for isbn, _, expected in report.books}
+        self.library.store.set_available_many((expected, isbn) for isbn, expected in fixes.items())
+        self.library.conn.commit()
+        for isbn, expected in fixes.items():
+            book = self.library.books.get(isbn)
+            if book is not None:
+                book.available_copies = expected
+        for member_id, _, expected in report.members:
+            self.library.members[member_id].borrowed_books = list(expected)
+        return len(fixes) + len(report.members)
+
+    def run(self, repair: bool = True) -> ConsistencyReport:
+        report = self.check()
+        if repair and not report.ok():
+            self.repair(report)
+        return report
+
+def open_library(db_name: str = "library.db", repair: bool = True) -> Library:
+    # Drop-in for Library(db_name) that verifies the counters before use
+    library = Library(db_name)
+    report = ConsistencyChecker(library).run(repair)
+    if not report.ok():
+        print(f"\n{report}" + ("\nRepaired." if repair else ""))
+    return library
+
+def benchmark(work_dir: str, books: int, drift: float = 0.01, seed: int = 42) -> Dict[str, float]:
+    db_name = os.path.join(work_dir, "bench_consistency.db")
+    LibraryGenerator(seed).generate(db_name, books=books, members=max(50, books // 2),
+                                    transactions=books * 2, overwrite=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        library = Library(db_name)
+    rng = random.Random(seed)
+    damaged = rng.sample(list(library.books), max(1, int(books * drift)))
+    library.store.set_available_many((library.books[isbn].available_copies + 1, isbn) for isbn in damaged)
+    library.conn.commit()
+    checker = ConsistencyChecker(library)
+    report = checker.check()
+    start = time.perf_counter()
+    checker.repair(report)
+    repair_seconds = time.perf_counter() - start
+    clean = checker.check()
+    library.conn.close()
+    os.remove(db_name)
+    return {"books": books, "damaged": len(damaged), "found": len(report.books),
+            "check": report.seconds, "repair": repair_seconds, "clean_check": clean.seconds,
+            "clean": clean.ok()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and repair Library copy counters against open loans")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="Report drifted counters")
+    check.add_argument("--db", default="library.db")
+    check.add_argument("--repair", action="store_true", help="Fix them in one transaction")
+    bench = sub.add_parser("bench", help="Time check and repair on a generated catalog")
+    bench.add_argument("--books", type=int, default=1_000_000)
+    bench.add_argument("--drift", type=float, default=0.01, help="Fraction of books to corrupt")
+    bench.add_argument("--work-dir", default=".")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        with contextlib.redirect_stdout(io.StringIO()):
+            library = Library(args.db)
+        report = ConsistencyChecker(library).run(args.repair)
+        print(report)
+        if args.repair and not report.ok():
+            print("Repaired.")
+        library.conn.close()
+    else:
+        stats = benchmark(args.work_dir, args.books, args.drift)
+        print(f"{stats['books']:,} books, {stats['damaged']:,} corrupted: found {stats['found']:,} in "
+              f"{stats['check'] * 1e3:.1f}ms, repaired in {stats['repair'] * 1e3:.1f}ms, "
+              f"clean re-check {stats['clean_check'] * 1e3:.1f}ms ({'ok' if stats['clean'] else 'FAILED'})")
+
+if __name__ == "__main__":
+    main()
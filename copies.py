@@ -0,0 +1,188 @@
+from typing import Dict, Optional, Tuple
+
+from testing2 import Library, Transaction
+
+# Tracks every physical copy by barcode. The copies table is the source of
+# truth for which copy is where; Book.copies/available_copies and the books
+# table columns are kept as a materialized count so availability checks stay
+# O(1). Plain Library.borrow_book(member_id, isbn) calls still work: they are
+# given any available copy of the ISBN.
+class CopyTracker:
+    def __init__(self, library: Library):
+        self.library = library
+        self.conn = library.conn
+        self.cursor = self.conn.cursor()
+        self.pending_barcode: Optional[str] = None
+        self.initialize_database()
+        self.backfill()
+        # Must run before other listeners: a hold queue may lend the returned
+        # copy from its own on_return, which needs the copy already shelved.
+        library.listeners.insert(0, self)
+
+    def initialize_database(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS copies (
+                barcode TEXT PRIMARY KEY,
+                isbn TEXT,
+                status TEXT,
+                transaction_id TEXT,
+                FOREIGN KEY(isbn) REFERENCES books(isbn),
+                FOREIGN KEY(transaction_id) REFERENCES transactions(transaction_id)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_copies_isbn_status ON copies (isbn, status)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_copies_transaction ON copies (transaction_id)
+        ''')
+        self.conn.commit()
+
+    def backfill(self):
+        # Databases created before barcodes existed get one row per counted
+        # copy, and open loans are pinned to some of them.
+        self.cursor.execute('''
+            SELECT isbn, COUNT(*), SUM(status != 'withdrawn') FROM copies GROUP BY isbn
+        ''')
+        tracked: Dict[str, Tuple[int, int]] = {row[0]: (row[1], row[2]) for row in self.cursor.fetchall()}
+        new_rows = []
+        for book in self.library.books.values():
+            _, active = tracked.get(book.isbn, (0, 0))
+            missing = book.copies - active
+            if missing > 0:
+                start = self._last_number(book.isbn) + 1
+                for number in range(start, start + missing):
+                    new_rows.append((f"{book.isbn}-{number:03d}", book.isbn, "available", None))
+        self.cursor.executemany('''
+            INSERT INTO copies (barcode, isbn, status, transaction_id) VALUES (?, ?, ?, ?)
+        ''', new_rows)
+        self.cursor.execute('''
+            SELECT transaction_id, book_isbn FROM transactions
+            WHERE return_date IS NULL
+              AND transaction_id NOT IN (SELECT transaction_id FROM copies WHERE transaction_id IS NOT NULL)
+        ''')
+        for transaction_id, isbn in self.cursor.fetchall():
+            barcode = self._available_barcode(isbn)
+            if barcode:
+                self._set_status(barcode, "on_loan", transaction_id)
+        self.conn.commit()
+
+    def _available_barcode(self, isbn: str) -> Optional[str]:
+        self.cursor.execute('''
+            SELECT barcode FROM copies WHERE isbn = ? AND status = 'available' LIMIT 1
+        ''', (isbn,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def _last_number(self, isbn: str) -> int:
+        # Highest n among barcodes "<isbn>-<n>", whichever book they were
+        # given to; a range over the primary key, so only those rows are read
+        prefix = f"{isbn}-"
+        self.cursor.execute('''
+            SELECT barcode FROM copies WHERE barcode > ? AND barcode < ?
+        ''', (prefix, f"{isbn}."))
+        suffixes = (row[0][len(prefix):] for row in self.cursor.fetchall())
+        return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+
+    def _set_status(self, barcode: str, status: str, transaction_id: Optional[str]):
+        self.cursor.execute('''
+            UPDATE copies SET status = ?, transaction_id = ? WHERE barcode = ?
+        ''', (status, transaction_id, barcode))
+
+    def _materialize(self, isbn: str):
+        book = self.library.books[isbn]
+        self.cursor.execute('''
+            UPDATE books SET copies = ?, available_copies = ? WHERE isbn = ?
+        ''', (book.copies, book.available_copies, isbn))
+
+    def lookup(self, barcode: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        # (isbn, status, transaction_id) through the primary key
+        self.cursor.execute('''
+            SELECT isbn, status, transaction_id FROM copies WHERE barcode = ?
+        ''', (barcode,))
+        return self.cursor.fetchone()
+
+    def copy_for_transaction(self, transaction_id: str) -> Optional[str]:
+        self.cursor.execute('''
+            SELECT barcode FROM copies WHERE transaction_id = ?
+        ''', (transaction_id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def add_copy(self, isbn: str, barcode: Optional[str] = None) -> Optional[str]:
+        if isbn not in self.library.books:
+            print("\nBook not found!")
+            return None
+        book = self.library.books[isbn]
+        if barcode is None:
+            # Past the highest number rather than the count, which an
+            # explicitly chosen "<isbn>-002" would collide with
+            barcode = f"{isbn}-{self._last_number(isbn) + 1:03d}"
+        if self.lookup(barcode):
+            print("\nBarcode already exists!")
+            return None
+        self.cursor.execute('''
+            INSERT INTO copies (barcode, isbn, status, transaction_id) VALUES (?, ?, ?, ?)
+        ''', (barcode, isbn, "available", None))
+        book.copies += 1
+        book.available_copies += 1
+        self._materialize(isbn)
+        self.conn.commit()
+        print(f"\nCopy {barcode} of '{book.title}' added!")
+        return barcode
+
+    def withdraw_copy(self, barcode: str) -> bool:
+        found = self.lookup(barcode)
+        if not found:
+            print("\nCopy not found!")
+            return False
+        isbn, status, _ = found
+        if status != "available":
+            print("\nOnly copies on the shelf can be withdrawn!")
+            return False
+        self._set_status(barcode, "withdrawn", None)
+        book = self.library.books[isbn]
+        book.copies -= 1
+        book.available_copies -= 1
+        self._materialize(isbn)
+        self.conn.commit()
+        print(f"\nCopy {barcode} withdrawn!")
+        return True
+
+    def borrow_copy(self, member_id: str, barcode: str) -> bool:
+        found = self.lookup(barcode)
+        if not found:
+            print("\nCopy not found!")
+            return False
+        isbn, status, _ = found
+        if status != "available":
+            print("\nThis copy is not on the shelf!")
+            return False
+        self.pending_barcode = barcode
+        try:
+            return self.library.borrow_book(member_id, isbn)
+        finally:
+            self.pending_barcode = None
+
+    def return_copy(self, barcode: str) -> bool:
+        found = self.lookup(barcode)
+        if not found:
+            print("\nCopy not found!")
+            return False
+        _, status, transaction_id = found
+        if status != "on_loan":
+            print("\nThis copy is not on loan!")
+            return False
+        return self.library.return_book(transaction_id)
+
+    def on_borrow(self, transaction: Transaction):
+        barcode = self.pending_barcode or self._available_barcode(transaction.book_isbn)
+        self.pending_barcode = None
+        if barcode:
+            self._set_status(barcode, "on_loan", transaction.transaction_id)
+        self._materialize(transaction.book_isbn)
+
+    def on_return(self, transaction: Transaction):
+        barcode = self.copy_for_transaction(transaction.transaction_id)
+        if barcode:
+            self._set_status(barcode, "available", None)
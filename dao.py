@@ -0,0 +1,232 @@
+import sqlite3
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Every statement Library runs lives here, written once, so each SQL string is
+# byte-identical across calls and sqlite3's per-connection statement cache
+# (keyed on the exact text) prepares it only once.
+SCHEMA = ('''
+    CREATE TABLE IF NOT EXISTS books (
+        isbn TEXT PRIMARY KEY,
+        title TEXT,
+        author TEXT,
+        year INTEGER,
+        copies INTEGER,
+        available_copies INTEGER
+    )
+''', '''
+    CREATE TABLE IF NOT EXISTS members (
+        member_id TEXT PRIMARY KEY,
+        name TEXT,
+        email TEXT,
+        fines REAL
+    )
+''', '''
+    CREATE TABLE IF NOT EXISTS transactions (
+        transaction_id TEXT PRIMARY KEY,
+        book_isbn TEXT,
+        member_id TEXT,
+        borrow_date TEXT,
+        return_date TEXT,
+        fine REAL,
+        FOREIGN KEY(book_isbn) REFERENCES books(isbn),
+        FOREIGN KEY(member_id) REFERENCES members(member_id)
+    )
+''')
+
+SELECT_BOOKS = "SELECT isbn, title, author, year, copies, available_copies FROM books"
+SELECT_MEMBERS = "SELECT member_id, name, email, fines FROM members"
+SELECT_TRANSACTIONS = ("SELECT transaction_id, book_isbn, member_id, borrow_date, return_date, fine "
+                       "FROM transactions")
+SELECT_BOOK = SELECT_BOOKS + " WHERE isbn = ?"
+SELECT_MEMBER = SELECT_MEMBERS + " WHERE member_id = ?"
+SELECT_TRANSACTION = SELECT_TRANSACTIONS + " WHERE transaction_id = ?"
+
+INSERT_BOOK = ("INSERT INTO books (isbn, title, author, year, copies, available_copies) "
+               "VALUES (?, ?, ?, ?, ?, ?)")
+INSERT_MEMBER = "INSERT INTO members (member_id, name, email, fines) VALUES (?, ?, ?, ?)"
+INSERT_TRANSACTION = ("INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, "
+                      "return_date, fine) VALUES (?, ?, ?, ?, ?, ?)")
+UPDATE_RETURN = "UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?"
+UPDATE_AVAILABLE = "UPDATE books SET available_copies = ? WHERE isbn = ?"
+UPDATE_FINES = "UPDATE members SET fines = ? WHERE member_id = ?"
+# Open loans are a small slice of transactions; the partial index lets the
+# consistency queries group them without scanning returned rows.
+OPEN_LOANS_INDEX = ("CREATE INDEX IF NOT EXISTS idx_transactions_open "
+                    "ON transactions (book_isbn, member_id) WHERE return_date IS NULL")
+# Books with open loans are reached from the grouped loans by primary key;
+# the rest only need available_copies = copies. Written as a LEFT JOIN from
+# books instead, SQLite probes an automatic index once per book, ~5x slower.
+AVAILABILITY_MISMATCHES = '''
+    SELECT books.isbn, books.available_copies, books.copies - open.loans
+    FROM (
+        SELECT book_isbn, COUNT(*) AS loans FROM transactions
+        WHERE return_date IS NULL GROUP BY book_isbn
+    ) AS open JOIN books ON books.isbn = open.book_isbn
+    WHERE books.available_copies IS NOT books.copies - open.loans
+    UNION ALL
+    SELECT isbn, available_copies, copies FROM books
+    WHERE available_copies IS NOT copies
+      AND isbn NOT IN (SELECT book_isbn FROM transactions WHERE return_date IS NULL)
+'''
+OPEN_LOANS_BY_MEMBER = ("SELECT member_id, GROUP_CONCAT(book_isbn, ' ') FROM transactions "
+                        "WHERE return_date IS NULL GROUP BY member_id")
+DELETE_BOOKS = "DELETE FROM books"
+DELETE_MEMBERS = "DELETE FROM members"
+DELETE_TRANSACTIONS = "DELETE FROM transactions"
+
+# The statements above plus the holds, copies, archive and popularity queries
+# that share Library's connection, with headroom; sqlite3's default is 128.
+STATEMENT_CACHE_SIZE = 256
+
+def connect(db_name: str, cached_statements: int = STATEMENT_CACHE_SIZE, **kwargs) -> sqlite3.Connection:
+    return sqlite3.connect(db_name, cached_statements=cached_statements, **kwargs)
+
+# Data access for Library. Writes go through one long-lived cursor: they never
+# leave a result set open, so sharing it is safe and saves a cursor per call.
+# Reads get a fresh cursor each, so a caller iterating one result set can run
+# other statements meanwhile. Rows are plain tuples unless row_factory is
+# given; the factory is set on that cursor only, never on the connection.
+class LibraryStore:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.writer = conn.cursor()
+
+    def query(self, sql: str, parameters: Tuple = (), row_factory=None) -> sqlite3.Cursor:
+        cursor = self.conn.cursor()
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+        return cursor.execute(sql, parameters)
+
+    def rows(self, sql: str, parameters: Tuple = ()) -> sqlite3.Cursor:
+        return self.query(sql, parameters, sqlite3.Row)
+
+    def create_schema(self):
+        for statement in SCHEMA:
+            self.writer.execute(statement)
+
+    def books(self) -> sqlite3.Cursor:
+        return self.query(SELECT_BOOKS)
+
+    def members(self) -> sqlite3.Cursor:
+        return self.query(SELECT_MEMBERS)
+
+    def transactions(self) -> sqlite3.Cursor:
+        return self.query(SELECT_TRANSACTIONS)
+
+    def book(self, isbn: str) -> Optional[sqlite3.Row]:
+        return self.rows(SELECT_BOOK, (isbn,)).fetchone()
+
+    def member(self, member_id: str) -> Optional[sqlite3.Row]:
+        return self.rows(SELECT_MEMBER, (member_id,)).fetchone()
+
+    def transaction(self, transaction_id: str) -> Optional[sqlite3.Row]:
+        return self.rows(SELECT_TRANSACTION, (transaction_id,)).fetchone()
+
+    def insert_book(self, isbn: str, title: str, author: str, year: int, copies: int, available: int):
+        self.writer.execute(INSERT_BOOK, (isbn, title, author, year, copies, available))
+
+    def insert_member(self, member_id: str, name: str, email: str, fines: float = 0.0):
+        self.writer.execute(INSERT_MEMBER, (member_id, name, email, fines))
+
+    def insert_transaction(self, transaction_id: str, isbn: str, member_id: str, borrow_date: str,
+                           return_date: Optional[str] = None, fine: float = 0.0):
+        self.writer.execute(INSERT_TRANSACTION, (transaction_id, isbn, member_id, borrow_date, return_date, fine))
+
+    def set_returned(self, transaction_id: str, return_date: str, fine: float):
+        self.writer.execute(UPDATE_RETURN, (return_date, fine, transaction_id))
+
+    def set_available(self, isbn: str, available: int):
+        self.writer.execute(UPDATE_AVAILABLE, (available, isbn))
+
+    def set_fines(self, member_id: str, fines: float):
+        self.writer.execute(UPDATE_FINES, (fines, member_id))
+
+    def availability_mismatches(self) -> sqlite3.Cursor:
+        # (isbn, stored available_copies, copies minus open loans) for drifted books
+        self.writer.execute(OPEN_LOANS_INDEX)
+        return self.query(AVAILABILITY_MISMATCHES)
+
+    def open_loans_by_member(self) -> sqlite3.Cursor:
+        # (member_id, space-separated ISBNs) for every member with an open loan
+        self.writer.execute(OPEN_LOANS_INDEX)
+        return self.query(OPEN_LOANS_BY_MEMBER)
+
+    def set_available_many(self, rows: Iterable[Tuple[int, str]]):
+        self.writer.executemany(UPDATE_AVAILABLE, rows)
+
+    def replace_all(self, books: Iterable[Tuple], members: Iterable[Tuple], transactions: Iterable[Tuple]):
+        # One executemany per table: the statement is bound once per table
+        # rather than looked up again for every row
+        self.writer.execute(DELETE_BOOKS)
+        self.writer.executemany(INSERT_BOOK, books)
+        self.writer.execute(DELETE_MEMBERS)
+        self.writer.executemany(INSERT_MEMBER, members)
+        self.writer.execute(DELETE_TRANSACTIONS)
+        self.writer.executemany(INSERT_TRANSACTION, transactions)
+
+def benchmark(db_name: str, books: int = 2000, members: int = 1000, operations: int = 5000,
+              cached_statements: int = STATEMENT_CACHE_SIZE, seed: int = 42) -> Dict[str, float]:
+    # Times Library's hot paths on a fresh database. Run once with
+    # cached_statements=0 for the re-parse-every-call baseline.
+    from testing2 import Library
+
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    with contextlib.redirect_stdout(io.StringIO()):
+        library = Library(db_name, cached_statements=cached_statements)
+        # Every operation commits; without this, fsync time swamps statement cost
+        library.conn.execute("PRAGMA synchronous = OFF")
+        results: Dict[str, float] = {"cached_statements": cached_statements}
+        start = time.perf_counter()
+        for i in range(books):
+            library.add_book(f"{9780000000000 + i}", f"Title {i}", f"Author {i % 97}", 2000, 3)
+        for i in range(members):
+            library.add_member(f"M{i:07d}", f"Member {i}", f"m{i}@example.com")
+        results["add_per_op"] = (time.perf_counter() - start) / (books + members)
+
+        rng = random.Random(seed)
+        isbns = list(library.books)
+        member_ids = list(library.members)
+        start = time.perf_counter()
+        borrowed = []
+        for _ in range(operations):
+            if library.borrow_book(rng.choice(member_ids), rng.choice(isbns)):
+                borrowed.append(f"T{library.last_transaction_number:05d}")
+        results["borrow_per_op"] = (time.perf_counter() - start) / operations
+        start = time.perf_counter()
+        for transaction_id in borrowed:
+            library.return_book(transaction_id)
+        results["return_per_op"] = (time.perf_counter() - start) / max(1, len(borrowed))
+
+        start = time.perf_counter()
+        for _ in range(operations):
+            library.store.book(rng.choice(isbns))
+        results["lookup_per_op"] = (time.perf_counter() - start) / operations
+        start = time.perf_counter()
+        library.save_data()
+        results["save_data"] = time.perf_counter() - start
+        library.conn.close()
+    os.remove(db_name)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Library statements with and without the statement cache")
+    parser.add_argument("--db", default="bench_dao.db")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--operations", type=int, default=5000)
+    args = parser.parse_args()
+    for size in (0, STATEMENT_CACHE_SIZE):
+        results = benchmark(args.db, args.books, args.members, args.operations, size)
+        print(f"cached_statements={size:>3}: add {results['add_per_op'] * 1e6:.1f}us/op, "
+              f"borrow {results['borrow_per_op'] * 1e6:.1f}us/op, return {results['return_per_op'] * 1e6:.1f}us/op, "
+              f"lookup {results['lookup_per_op'] * 1e6:.1f}us/op, save_data {results['save_data'] * 1e3:.1f}ms")
+
+if __name__ == "__main__":
+    main()
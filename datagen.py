@@ -0,0 +1,157 @@
+import sqlite3
+import datetime
+import argparse
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from testing2 import Library
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+               "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil", "Trent", "Victor", "Walter", "Zoe"]
+LAST_NAMES = ["Johnson", "Smith", "Doe", "Brown", "Garcia", "Miller", "Davis", "Wilson", "Moore", "Taylor",
+              "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", "Thompson", "Lee", "Walker", "Hall"]
+TITLE_WORDS = ["Python", "Data", "Structures", "Algorithms", "Systems", "Design", "History", "Modern",
+               "Introduction", "Advanced", "Theory", "Practice", "Networks", "Databases", "Art", "Science",
+               "Principles", "Patterns", "Guide", "Handbook", "Analysis", "Computing", "World", "Mind"]
+
+# Writes a synthetic but internally consistent library straight into SQLite:
+# open loans respect the 3-book member limit and each book's copy count, and
+# available_copies equals copies minus open loans. The same seed always
+# produces the same database.
+class LibraryGenerator:
+    def __init__(self, seed: int = 42, years: int = 5, loan_days: int = 14,
+                 open_loan_window: int = 30, chunk_size: int = 50000):
+        self.rng = random.Random(seed)
+        self.years = years
+        self.loan_days = loan_days
+        self.open_loan_window = open_loan_window
+        self.chunk_size = chunk_size
+
+    def books(self, count: int) -> Iterator[Tuple]:
+        rng = self.rng
+        for i in range(count):
+            title = " ".join(rng.sample(TITLE_WORDS, rng.randint(2, 4)))
+            author = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            yield (f"{9780000000000 + i:013d}", title, author, rng.randint(1950, 2024), rng.randint(1, 5))
+
+    def members(self, count: int) -> Iterator[Tuple]:
+        rng = self.rng
+        for i in range(count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield (f"M{i + 1:07d}", f"{first} {last}", f"{first.lower()}.{last.lower()}{i}@example.com", 0.0)
+
+    def transactions(self, count: int, isbns: List[str], copies: Dict[str, int],
+                     member_ids: List[str], today: datetime.date) -> Iterator[Tuple]:
+        rng = self.rng
+        span = self.years * 365
+        start = today.toordinal() - span
+        # Popular titles get most of the traffic (roughly Zipf)
+        weights = [1.0 / (rank + 1) for rank in range(len(isbns))]
+        cumulative = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        days = sorted(rng.randrange(span + 1) for _ in range(count))
+        open_by_member: Dict[str, int] = {}
+        open_by_book: Dict[str, int] = {}
+        for number, offset in enumerate(days, 1):
+            borrow_day = start + offset
+            isbn = rng.choices(isbns, cum_weights=cumulative)[0]
+            member_id = rng.choice(member_ids)
+            borrowed = datetime.date.fromordinal(borrow_day)
+            duration = max(1, int(rng.expovariate(1.0 / self.loan_days)))
+            return_day = borrow_day + duration
+            recent = today.toordinal() - borrow_day < self.open_loan_window
+            can_stay_open = (open_by_member.get(member_id, 0) < 3 and
+                             open_by_book.get(isbn, 0) < copies[isbn])
+            if return_day > today.toordinal() and recent and can_stay_open:
+                open_by_member[member_id] = open_by_member.get(member_id, 0) + 1
+                open_by_book[isbn] = open_by_book.get(isbn, 0) + 1
+                yield (f"T{number:05d}", isbn, member_id, borrowed.strftime("%Y-%m-%d"), None, 0.0)
+                continue
+            return_day = min(return_day, today.toordinal())
+            fine = max(0, (return_day - borrow_day - 14) * 1.0)
+            returned = datetime.date.fromordinal(return_day).strftime("%Y-%m-%d")
+            yield (f"T{number:05d}", isbn, member_id, borrowed.strftime("%Y-%m-%d"), returned, fine)
+
+    def _insert(self, conn: sqlite3.Connection, sql: str, rows: Iterator[Tuple]) -> int:
+        written = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                conn.executemany(sql, chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            conn.executemany(sql, chunk)
+            written += len(chunk)
+        return written
+
+    def generate(self, db_name: str, books: int, members: int, transactions: int,
+                 today: Optional[datetime.date] = None, overwrite: bool = False) -> Dict[str, float]:
+        today = today or datetime.date.today()
+        if os.path.exists(db_name):
+            if not overwrite:
+                raise FileExistsError(f"{db_name} already exists")
+            os.remove(db_name)
+        # Let Library create the schema so generated files match real ones
+        Library(db_name).conn.close()
+        conn = sqlite3.connect(db_name)
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        started = time.perf_counter()
+        book_rows = list(self.books(books))
+        copies = {row[0]: row[4] for row in book_rows}
+        member_ids = [f"M{i + 1:07d}" for i in range(members)]
+        self._insert(conn, '''
+            INSERT INTO members (member_id, name, email, fines) VALUES (?, ?, ?, ?)
+        ''', self.members(members))
+        fines: Dict[str, float] = {}
+        open_loans: Dict[str, int] = {}
+
+        def tracked(rows: Iterator[Tuple]) -> Iterator[Tuple]:
+            for row in rows:
+                if row[4] is None:
+                    open_loans[row[1]] = open_loans.get(row[1], 0) + 1
+                elif row[5]:
+                    fines[row[2]] = fines.get(row[2], 0.0) + row[5]
+                yield row
+
+        self._insert(conn, '''
+            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', tracked(self.transactions(transactions, list(copies), copies, member_ids, today)))
+        self._insert(conn, '''
+            INSERT INTO books (isbn, title, author, year, copies, available_copies)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (row + (row[4] - open_loans.get(row[0], 0),) for row in book_rows))
+        conn.executemany('''
+            UPDATE members SET fines = ? WHERE member_id = ?
+        ''', ((amount, member_id) for member_id, amount in fines.items()))
+        conn.commit()
+        conn.close()
+        elapsed = time.perf_counter() - started
+        return {"books": books, "members": members, "transactions": transactions,
+                "open_loans": sum(open_loans.values()), "seconds": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic library database")
+    parser.add_argument("--db", default="library.db")
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+    stats = LibraryGenerator(args.seed, args.years).generate(args.db, args.books, args.members,
+                                                             args.transactions, overwrite=args.overwrite)
+    print(f"Generated {stats['books']} books, {stats['members']} members, {stats['transactions']} transactions "
+          f"({stats['open_loans']} open) in {stats['seconds']:.2f}s")
+
+if __name__ == "__main__":
+    main()
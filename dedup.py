@@ -0,0 +1,178 @@
+import sqlite3
+import argparse
+import math
+import re
+import time
+import unicodedata
+from typing import List, Dict, Set, Tuple
+
+from testing2 import Library, Book
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+def normalize_author(author: str) -> str:
+    # "Smith, John" and "John Smith" should compare equal
+    return " ".join(sorted(normalize(author).split()))
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def book_grams(title: str, author: str) -> Set[str]:
+    # Title and author grams are tagged so "king" in a title never matches an author
+    return ({"t" + gram for gram in trigrams(normalize(title))} |
+            {"a" + gram for gram in trigrams(normalize_author(author))})
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+# Trigram inverted index over normalized title/author. Similarity lookups only
+# score books sharing at least one gram, and the batch report uses prefix
+# filtering (grams ordered rarest first, only the first |A| - ceil(t|A|) + 1
+# indexed), which finds every pair at or above the threshold without
+# comparing all pairs.
+class TrigramIndex:
+    def __init__(self):
+        self.grams: Dict[str, Set[str]] = {}  # isbn -> grams
+        self.postings: Dict[str, Set[str]] = {}  # gram -> isbns
+
+    def add(self, isbn: str, title: str, author: str):
+        grams = book_grams(title, author)
+        self.grams[isbn] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(isbn)
+
+    def remove(self, isbn: str):
+        for gram in self.grams.pop(isbn, set()):
+            self.postings[gram].discard(isbn)
+
+    def similar(self, title: str, author: str, threshold: float = 0.6,
+                limit: int = 10) -> List[Tuple[str, float]]:
+        grams = book_grams(title, author)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for isbn in self.postings.get(gram, ()):
+                shared[isbn] = shared.get(isbn, 0) + 1
+        matches = []
+        for isbn, count in shared.items():
+            score = count / (len(grams) + len(self.grams[isbn]) - count)
+            if score >= threshold:
+                matches.append((isbn, score))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+    def duplicate_pairs(self, threshold: float = 0.8) -> List[Tuple[str, str, float]]:
+        frequency = {gram: len(isbns) for gram, isbns in self.postings.items()}
+        ordered = {isbn: sorted(grams, key=lambda gram: (frequency[gram], gram))
+                   for isbn, grams in self.grams.items()}
+        prefix_index: Dict[str, List[str]] = {}
+        pairs = []
+        # Shorter records first: a record can only match ones of similar size
+        for isbn in sorted(ordered, key=lambda isbn: len(ordered[isbn])):
+            tokens = ordered[isbn]
+            size = len(tokens)
+            prefix = size - math.ceil(threshold * size) + 1
+            candidates: Set[str] = set()
+            for gram in tokens[:prefix]:
+                for other in prefix_index.get(gram, ()):
+                    # Length filter: |B| >= t|A| is required for Jaccard >= t
+                    if len(self.grams[other]) >= threshold * size:
+                        candidates.add(other)
+                prefix_index.setdefault(gram, []).append(isbn)
+            for other in candidates:
+                score = jaccard(self.grams[isbn], self.grams[other])
+                if score >= threshold:
+                    pairs.append((other, isbn, score))
+        return pairs
+
+def group_duplicates(pairs: List[Tuple[str, str, float]]) -> List[List[str]]:
+    parent: Dict[str, str] = {}
+
+    def find(isbn: str) -> str:
+        parent.setdefault(isbn, isbn)
+        while parent[isbn] != isbn:
+            parent[isbn] = parent[parent[isbn]]
+            isbn = parent[isbn]
+        return isbn
+
+    for a, b, _ in pairs:
+        parent[find(a)] = find(b)
+    groups: Dict[str, List[str]] = {}
+    for isbn in parent:
+        groups.setdefault(find(isbn), []).append(isbn)
+    return sorted(sorted(group) for group in groups.values())
+
+# Keeps a TrigramIndex in step with a Library's catalog and warns about near
+# duplicates before a new ISBN is added.
+class CatalogDeduplicator:
+    def __init__(self, library: Library, threshold: float = 0.8):
+        self.library = library
+        self.threshold = threshold
+        self.index = TrigramIndex()
+        for book in library.books.values():
+            self.index.add(book.isbn, book.title, book.author)
+
+    def find_similar(self, title: str, author: str, limit: int = 5) -> List[Book]:
+        return [self.library.books[isbn]
+                for isbn, _ in self.index.similar(title, author, self.threshold, limit)
+                if isbn in self.library.books]
+
+    def add_book(self, isbn: str, title: str, author: str, year: int, copies: int,
+                 force: bool = False) -> bool:
+        similar = self.find_similar(title, author)
+        if similar and not force:
+            print("\nPossible duplicates found:")
+            for book in similar:
+                print(f"- {book}")
+            return False
+        if not self.library.add_book(isbn, title, author, year, copies):
+            return False
+        self.index.add(isbn, title, author)
+        return True
+
+    def report(self):
+        groups = group_duplicates(self.index.duplicate_pairs(self.threshold))
+        print(f"\nDuplicate Report ({len(groups)} groups):")
+        for group in groups:
+            print("Group:")
+            for isbn in group:
+                print(f"- {self.library.books[isbn]}")
+        return groups
+
+def dedup_database(db_name: str, threshold: float) -> List[List[str]]:
+    # Reads the books table directly so the report does not need a full Library load
+    conn = sqlite3.connect(db_name)
+    index = TrigramIndex()
+    start = time.perf_counter()
+    cursor = conn.execute("SELECT isbn, title, author FROM books")
+    while True:
+        rows = cursor.fetchmany(10000)
+        if not rows:
+            break
+        for isbn, title, author in rows:
+            index.add(isbn, title or "", author or "")
+    indexed = time.perf_counter()
+    groups = group_duplicates(index.duplicate_pairs(threshold))
+    done = time.perf_counter()
+    print(f"Indexed {len(index.grams)} books in {indexed - start:.2f}s, "
+          f"found {len(groups)} duplicate groups in {done - indexed:.2f}s")
+    for group in groups:
+        placeholders = ", ".join("?" for _ in group)
+        for row in conn.execute(f"SELECT isbn, title, author FROM books WHERE isbn IN ({placeholders})", group):
+            print(f"{row[0]}\t{row[1]}\t{row[2]}")
+        print()
+    conn.close()
+    return groups
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report likely duplicate books")
+    parser.add_argument("--db", default="library.db")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+    dedup_database(args.db, args.threshold)
@@ -0,0 +1,225 @@
+import argparse
+import multiprocessing
+import random
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional, Tuple
+
+from testing import Game, Player, RandomStreams, Room
+from replay import _Discard
+
+ACTIONS = ("go north", "go south", "go east", "go west", "take", "use potion", "attack", "wait")
+GO_NORTH, GO_SOUTH, GO_EAST, GO_WEST, TAKE, USE_POTION, ATTACK, WAIT = range(len(ACTIONS))
+DIRECTIONS = ("north", "south", "east", "west")
+# Observation: room index, health, max health, attack power, armor, level,
+# gold, potions carried, items in the room, enemies in the room, first
+# enemy's health and attack, and a bit mask of exits (north=1 ... west=8)
+OBSERVATION_SIZE = 13
+
+STEP_REWARD = -0.01
+INVALID_REWARD = -0.1
+DEATH_REWARD = -10.0
+CLEAR_REWARD = 10.0
+
+class AgentPlayer(Player):
+    # Player.take_damage ends the process on death; here it only ends the
+    # episode, which step() sees from the player's health
+    def take_damage(self, damage: int):
+        actual_damage = max(0, damage - self.armor)
+        self.health -= actual_damage
+        print(f"\n{self.name} takes {actual_damage} damage!")
+        if self.health <= 0:
+            print(f"\n{self.name} has been defeated!")
+
+# Gymnasium-style environment over the Game world: reset(seed) returns
+# (observation, info) and step(action) returns (observation, reward,
+# terminated, truncated, info). Actions run through Game's own move, take,
+# use, player_attack and enemy_attack with no combat delay and their output
+# discarded; only the rewards are worked out here. One step is one action,
+# and an attack is one round of combat. The episode ends when the player
+# dies or every enemy is defeated.
+class DungeonEnv:
+    def __init__(self, max_steps: int = 200):
+        self.max_steps = max_steps
+        self.game = Game()
+        self.game.turn_delay = 0
+        self.output = _Discard()
+        self.player: Optional[AgentPlayer] = None
+        self.steps = 0
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[Tuple[int, ...], Dict]:
+        if seed is not None:
+            self.game.rng = RandomStreams(seed)
+        self.game.setup_game()
+        self.room_index: Dict[Room, int] = {room: index for index, room in enumerate(self.game.rooms.values())}
+        self.enemies_left = sum(len(room.enemies) for room in self.game.rooms.values())
+        self.player = AgentPlayer("agent")
+        self.player.current_room = self.game.rooms["entrance"]
+        self.game.player = self.player
+        self.steps = 0
+        return self.observe(), {}
+
+    def observe(self) -> Tuple[int, ...]:
+        player = self.player
+        room = player.current_room
+        exits = room.exits
+        enemy = room.enemies[0] if room.enemies else None
+        return (self.room_index[room], player.health, player.max_health, player.attack_power, player.armor,
+                player.level, player.gold, sum(1 for item in player.inventory if item.name == "Health Potion"),
+                len(room.items), len(room.enemies), enemy.health if enemy else 0, enemy.attack if enemy else 0,
+                ("north" in exits) | ("south" in exits) << 1 | ("east" in exits) << 2 | ("west" in exits) << 3)
+
+    def step(self, action: int) -> Tuple[Tuple[int, ...], float, bool, bool, Dict]:
+        with redirect_stdout(self.output):
+            reward, terminated = self._act(action)
+        self.steps += 1
+        truncated = not terminated and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, {}
+
+    def _act(self, action: int) -> Tuple[float, bool]:
+        game, player = self.game, self.player
+        room = player.current_room
+        reward = STEP_REWARD
+        if action <= GO_WEST:
+            if not game.move(player, DIRECTIONS[action]):
+                reward += INVALID_REWARD
+        elif action == TAKE:
+            if room.items and game.take(player, room.items[0].name):
+                reward += player.inventory[-1].value / 100
+            else:
+                reward += INVALID_REWARD
+        elif action == USE_POTION:
+            health = player.health
+            if game.use(player, "Health Potion"):
+                reward += (player.health - health) / 100
+            else:
+                reward += INVALID_REWARD
+        elif action == ATTACK:
+            if not room.enemies:
+                return reward + INVALID_REWARD, False
+            enemy = room.enemies[0]
+            if game.player_attack(player, enemy):
+                room.enemies.remove(enemy)
+                self.enemies_left -= 1
+                reward += (enemy.exp_reward + enemy.gold_reward) / 10
+                if not self.enemies_left:
+                    return reward + CLEAR_REWARD, True
+            else:
+                health = player.health
+                game.enemy_attack(enemy, player)
+                reward -= (health - player.health) / 100
+                if player.health <= 0:
+                    return reward + DEATH_REWARD, True
+        return reward, False
+
+# Steps N environments in lockstep. Finished episodes reset on the spot and
+# report the new episode's first observation, as Gymnasium vector envs do.
+class VectorDungeonEnv:
+    def __init__(self, num_envs: int, seed: int = 0, max_steps: int = 200):
+        self.envs = [DungeonEnv(max_steps) for _ in range(num_envs)]
+        self.seed = seed
+        self.episodes = 0
+
+    def reset(self, seed: Optional[int] = None) -> List[Tuple[int, ...]]:
+        if seed is not None:
+            self.seed = seed
+        return [env.reset(self.seed + index)[0] for index, env in enumerate(self.envs)]
+
+    def step(self, actions: List[int]) -> Tuple[List, List[float], List[bool], List[bool]]:
+        observations, rewards, terminated, truncated = [], [], [], []
+        for env, action in zip(self.envs, actions):
+            observation, reward, done, cut, _ = env.step(action)
+            if done or cut:
+                self.episodes += 1
+                observation = env.reset()[0]  # Continues the env's own random stream
+            observations.append(observation)
+            rewards.append(reward)
+            terminated.append(done)
+            truncated.append(cut)
+        return observations, rewards, terminated, truncated
+
+def _worker(conn, num_envs: int, seed: int, max_steps: int):
+    env = VectorDungeonEnv(num_envs, seed, max_steps)
+    while True:
+        command, data = conn.recv()
+        if command == "step":
+            conn.send(env.step(data))
+        elif command == "reset":
+            conn.send(env.reset(data))
+        else:
+            conn.close()
+            return
+
+# Same interface as VectorDungeonEnv, with the environments split across
+# worker processes. Each step sends every worker its slice of actions before
+# collecting any results, so the workers run in parallel.
+class ProcessVectorEnv:
+    def __init__(self, num_envs: int, workers: Optional[int] = None, seed: int = 0, max_steps: int = 200):
+        workers = max(1, min(num_envs, workers or multiprocessing.cpu_count()))
+        sizes = [num_envs // workers + (1 if index < num_envs % workers else 0) for index in range(workers)]
+        self.slices = []
+        self.connections = []
+        self.processes = []
+        start = 0
+        for size in sizes:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, args=(child, size, seed + start, max_steps), daemon=True)
+            process.start()
+            child.close()
+            self.slices.append((start, start + size))
+            self.connections.append(parent)
+            self.processes.append(process)
+            start += size
+        self.seed = seed
+
+    def reset(self, seed: Optional[int] = None) -> List[Tuple[int, ...]]:
+        if seed is not None:
+            self.seed = seed
+        for conn, (start, _) in zip(self.connections, self.slices):
+            conn.send(("reset", self.seed + start))
+        return [observation for conn in self.connections for observation in conn.recv()]
+
+    def step(self, actions: List[int]) -> Tuple[List, List[float], List[bool], List[bool]]:
+        for conn, (start, end) in zip(self.connections, self.slices):
+            conn.send(("step", actions[start:end]))
+        observations, rewards, terminated, truncated = [], [], [], []
+        for conn in self.connections:
+            obs, rew, done, cut = conn.recv()
+            observations.extend(obs)
+            rewards.extend(rew)
+            terminated.extend(done)
+            truncated.extend(cut)
+        return observations, rewards, terminated, truncated
+
+    def close(self):
+        for conn in self.connections:
+            conn.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+def benchmark(num_envs: int, steps: int, workers: int = 0, seed: int = 0) -> Dict[str, float]:
+    rng = random.Random(seed)
+    env = ProcessVectorEnv(num_envs, workers, seed) if workers else VectorDungeonEnv(num_envs, seed)
+    env.reset()
+    action_count = len(ACTIONS)
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step([rng.randrange(action_count) for _ in range(num_envs)])
+    elapsed = time.perf_counter() - start
+    if workers:
+        env.close()
+    return {"envs": num_envs, "workers": workers, "steps": steps * num_envs,
+            "steps_per_sec": steps * num_envs / elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure DungeonEnv throughput with random actions")
+    parser.add_argument("--envs", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=2000, help="Lockstep steps; total is envs x steps")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes; 0 steps in this process")
+    args = parser.parse_args()
+    stats = benchmark(args.envs, args.steps, args.workers)
+    where = f"{stats['workers']} worker processes" if stats["workers"] else "in-process"
+    print(f"{stats['envs']} envs {where}: {stats['steps']:,} steps at {stats['steps_per_sec']:,.0f} steps/s")
+
+if __name__ == "__main__":
+    main()
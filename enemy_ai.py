@@ -0,0 +1,309 @@
+import argparse
+import random
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from testing import Game, Player, Room, Enemy
+from scheduler import WorldSimulation
+
+PATROL, WANDER, GUARD = "patrol", "wander", "guard"
+FAR = 1 << 30  # Distance for rooms outside every player's sight
+
+class Brain:
+    __slots__ = ("enemy", "room", "mode", "route", "step", "phase", "last_ticked")
+
+    def __init__(self, enemy: Enemy, room: Room, mode: str, phase: int):
+        self.enemy = enemy
+        self.room = room
+        self.mode = mode
+        self.route: Optional[List[Room]] = None  # Patrol loop; consecutive rooms are adjacent
+        self.step = 0
+        self.phase = phase  # Thinks on ticks where now % period == phase
+        self.last_ticked = -1  # Last tick it thought on or was fast-forwarded through
+
+# Moves enemies through the room graph. Each enemy thinks once every
+# `period` ticks, on its own phase, so a tick only visits the enemies due on
+# it. A player within `sight` exits overrides the base mode: the enemy
+# chases, or flees below `flee_percent` of its health. Chasing and fleeing
+# read one shared field, rebuilt only when some player changes room: a
+# multi-source BFS from every player's room over reversed exits, giving each
+# room within sight its distance and next hop toward the nearest player. A
+# decision is then a dict lookup, whatever the world or player count.
+#
+# With an InterestManager the AI is one of its systems and only enemies in
+# awake regions think; patrols in sleeping regions are fast-forwarded along
+# their routes on wake. Decisions that do not fit in `budget_ms` wait in a
+# queue that is served first on the next tick. Random choices come from the
+# game's "ai" stream, so they are saved and restored with the game.
+class EnemyAI:
+    def __init__(self, simulation: WorldSimulation, period: int = 10, sight: int = 4,
+                 flee_percent: int = 25, patrol_length: int = 6, budget_ms: float = 5.0,
+                 modes: Tuple[Tuple[str, float], ...] = ((PATROL, 0.4), (WANDER, 0.4), (GUARD, 0.2)),
+                 interest=None):
+        self.simulation = simulation
+        self.game = simulation.game
+        self.period = period
+        self.sight = sight
+        self.flee_percent = flee_percent
+        self.patrol_length = patrol_length
+        self.budget = budget_ms / 1000
+        self.modes = [mode for mode, _ in modes]
+        self.mode_weights = [weight for _, weight in modes]
+        self.interest = interest
+        self.on_move: Optional[Callable[[Enemy, Room, Room], None]] = None
+        self.buckets: Dict[object, List[Dict[Brain, None]]] = {}
+        self.deferred: OrderedDict = OrderedDict()  # Brains that missed their turn, oldest first
+        self.field: Dict[Room, Tuple[int, Optional[Room]]] = {}
+        self.field_key: Tuple = ()
+        self.tick_now = -1
+        self.deadline = 0.0
+        self.thinks = 0
+        self.rooms = None
+        respawn = simulation.respawn
+
+        def respawn_with_brain(enemy: Enemy, room: Room):
+            respawn(enemy, room)
+            self.add_enemy(room.enemies[-1], room)
+        simulation.respawn = respawn_with_brain
+        if interest is not None:
+            interest.add_system(self)
+        else:
+            simulation.wheel.every(1, self._tick_everything)
+
+    def attach(self):
+        self.rooms = self.game.rooms
+        self.buckets = {}
+        self.deferred = OrderedDict()
+        self.exits: Dict[Room, Tuple[Room, ...]] = {room: tuple(room.exits.values()) for room in self.rooms.values()}
+        self.incoming: Dict[Room, List[Room]] = {room: [] for room in self.rooms.values()}
+        for room, neighbours in self.exits.items():
+            for neighbour in neighbours:
+                self.incoming.setdefault(neighbour, []).append(room)
+        for room in self.rooms.values():
+            for enemy in room.enemies:
+                self.add_enemy(enemy, room)
+
+    @property
+    def rng(self) -> random.Random:
+        # Looked up each time: loading a save replaces the game's streams
+        return self.game.rng.stream("ai")
+
+    def _region(self, room: Room):
+        return self.interest.room_region[room] if self.interest is not None else None
+
+    def add_enemy(self, enemy: Enemy, room: Room, mode: Optional[str] = None) -> Brain:
+        mode = mode or self.rng.choices(self.modes, self.mode_weights)[0]
+        brain = Brain(enemy, room, mode, self.rng.randrange(self.period))
+        self._bucket(room)[brain.phase][brain] = None
+        return brain
+
+    def _bucket(self, room: Room) -> List[Dict[Brain, None]]:
+        region = self._region(room)
+        bucket = self.buckets.get(region)
+        if bucket is None:
+            bucket = self.buckets[region] = [{} for _ in range(self.period)]
+        return bucket
+
+    def _players(self) -> List[Player]:
+        players = [player for player in self.simulation.players if player.health > 0]
+        if self.game.player is not None and self.game.player not in self.simulation.players:
+            players.append(self.game.player)
+        return players
+
+    def _refresh_field(self):
+        sources = {id(player.current_room): player.current_room
+                   for player in self._players() if player.current_room is not None}
+        key = tuple(sorted(sources))
+        if key == self.field_key:
+            return
+        self.field_key = key
+        field: Dict[Room, Tuple[int, Optional[Room]]] = {}
+        frontier = []
+        for room in sources.values():
+            field[room] = (0, None)
+            frontier.append(room)
+        incoming = self.incoming
+        for distance in range(1, self.sight + 1):
+            next_frontier = []
+            for room in frontier:
+                for source in incoming.get(room, ()):
+                    if source not in field:
+                        field[source] = (distance, room)
+                        next_frontier.append(source)
+            frontier = next_frontier
+        self.field = field
+
+    def _start_tick(self, now: int):
+        if self.game.rooms is not self.rooms:
+            self.attach()
+        self.tick_now = now
+        self.deadline = time.perf_counter() + self.budget
+        self._refresh_field()
+        deferred = self.deferred
+        count = 0
+        while deferred:
+            if not count & 255 and time.perf_counter() > self.deadline:
+                return
+            self.think(deferred.popitem(last=False)[0])
+            count += 1
+
+    def _think_all(self, brains: List[Brain]):
+        # Under sustained overload every brain waits in the deferred queue at
+        # most once, so decisions slow down evenly instead of piling up
+        deferred = self.deferred
+        for count, brain in enumerate(brains):
+            if brain in deferred:
+                continue  # Already queued; it keeps its place there
+            if not count & 255 and time.perf_counter() > self.deadline:
+                for late in brains[count:]:
+                    deferred[late] = None
+                return
+            self.think(brain)
+
+    def tick(self, region, now: int):
+        if now != self.tick_now:
+            self._start_tick(now)
+        bucket = self.buckets.get(region)
+        if bucket is not None:
+            due = bucket[now % self.period]
+            if due:
+                self._think_all(list(due))
+
+    def _tick_everything(self):
+        self.tick(None, self.simulation.wheel.now)
+
+    def think(self, brain: Brain):
+        enemy, room = brain.enemy, brain.room
+        if enemy.health <= 0 or enemy not in room.enemies:
+            # Killed, or removed by someone else; forget it
+            self._bucket(room)[brain.phase].pop(brain, None)
+            return
+        self.thinks += 1
+        brain.last_ticked = self.tick_now
+        entry = self.field.get(room)
+        destination = None
+        if entry is not None:
+            distance, toward = entry
+            brain.route = None  # Off the patrol loop from here on
+            if enemy.health * 100 < enemy.max_health * self.flee_percent:
+                destination = self._away(room, distance)
+            elif (distance > 0 and brain.mode != GUARD) or distance == 1:
+                destination = toward  # Guards only step out to an adjacent player
+        elif brain.mode == PATROL:
+            if brain.route is None:
+                brain.route = self._patrol_route(room)
+                brain.step = 0
+            if len(brain.route) > 1:
+                brain.step = (brain.step + 1) % len(brain.route)
+                destination = brain.route[brain.step]
+        elif brain.mode == WANDER:
+            exits = self.exits.get(room)
+            if exits and self.rng.random() < 0.5:
+                destination = exits[self.rng.randrange(len(exits))]
+        if destination is not None and destination is not room:
+            self.move(brain, destination)
+
+    def _away(self, room: Room, distance: int) -> Optional[Room]:
+        best, best_distance = None, distance
+        field = self.field
+        for neighbour in self.exits.get(room, ()):
+            entry = field.get(neighbour)
+            neighbour_distance = entry[0] if entry is not None else FAR
+            if neighbour_distance > best_distance:
+                best, best_distance = neighbour, neighbour_distance
+        return best
+
+    def _patrol_route(self, room: Room) -> List[Room]:
+        # Random walk out, then the same way back: a loop of adjacent rooms
+        path = [room]
+        for _ in range(self.patrol_length):
+            exits = self.exits.get(path[-1])
+            if not exits:
+                break
+            path.append(exits[self.rng.randrange(len(exits))])
+        return path + path[-2:0:-1]
+
+    def move(self, brain: Brain, destination: Room):
+        room = brain.room
+        room.enemies.remove(brain.enemy)
+        destination.enemies.append(brain.enemy)
+        brain.room = destination
+        if self.interest is not None:
+            old_region, new_region = self._region(room), self._region(destination)
+            if old_region is not new_region:
+                self._bucket(room)[brain.phase].pop(brain, None)
+                self._bucket(destination)[brain.phase][brain] = None
+        if self.on_move is not None:
+            self.on_move(brain.enemy, room, destination)
+
+    def fast_forward(self, region, start: int, end: int):
+        # Patrols keep walking their loop while nobody is near; everyone
+        # else stays put. A brain that walked in from an awake region
+        # already took its turns up to its last_ticked.
+        bucket = self.buckets.get(region)
+        if bucket is None or end <= start:
+            return
+        for phase, brains in enumerate(bucket):
+            for brain in list(brains):
+                since = max(start, brain.last_ticked + 1)
+                brain.last_ticked = end - 1
+                if brain.mode != PATROL or not brain.route or brain.enemy not in brain.room.enemies:
+                    continue
+                # Ticks in [since, end) on which this phase was due
+                steps = (end - 1 - phase) // self.period - (since - 1 - phase) // self.period
+                if steps <= 0:
+                    continue
+                brain.step = (brain.step + steps) % len(brain.route)
+                destination = brain.route[brain.step]
+                if destination is not brain.room:
+                    on_move, self.on_move = self.on_move, None  # Nobody was there to see it
+                    self.move(brain, destination)
+                    self.on_move = on_move
+
+def benchmark(width: int, height: int, players: int, ticks: int, period: int,
+              budget_ms: float, seed: int = 42) -> Dict[str, float]:
+    from worldgen import generate_world
+
+    rng = random.Random(seed)
+    game = generate_world(width, height, enemy_chance=1.0, item_chance=0.0, seed=seed, game=Game(seed))
+    simulation = WorldSimulation(game, respawn_ticks=10 ** 6, regen_ticks=10 ** 6)
+    ai = EnemyAI(simulation, period=period, budget_ms=budget_ms)
+    rooms = list(game.rooms.values())
+    walkers = [Player(f"p{i}") for i in range(players)]
+    for player in walkers:
+        player.current_room = rng.choice(rooms)
+        simulation.add_player(player)
+    enemies = sum(len(room.enemies) for room in rooms)
+    simulation.wheel.advance(1)  # Builds the brains
+    ai.thinks = 0
+    worst = 0.0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for player in walkers:
+            if rng.random() < 0.2:
+                player.current_room = rng.choice(list(player.current_room.exits.values()))
+        tick_start = time.perf_counter()
+        simulation.wheel.advance(1)
+        worst = max(worst, time.perf_counter() - tick_start)
+    elapsed = time.perf_counter() - start
+    return {"rooms": len(rooms), "enemies": enemies, "ticks": ticks, "per_tick": elapsed / ticks,
+            "worst_tick": worst, "thinks": ai.thinks, "per_think": elapsed / max(1, ai.thinks),
+            "deferred": len(ai.deferred)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark roaming enemy AI")
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--height", type=int, default=250)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--period", type=int, default=10, help="Ticks between each enemy's decisions")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    stats = benchmark(args.width, args.height, args.players, args.ticks, args.period, args.budget_ms)
+    print(f"{stats['enemies']:,} enemies in {stats['rooms']:,} rooms: {stats['per_tick'] * 1e3:.2f}ms/tick "
+          f"(worst {stats['worst_tick'] * 1e3:.2f}ms), {stats['thinks']:,} decisions at "
+          f"{stats['per_think'] * 1e6:.2f}us each, {stats['deferred']} deferred at the end")
+
+if __name__ == "__main__":
+    main()
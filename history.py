@@ -0,0 +1,141 @@
+import bisect
+import datetime
+import functools
+from typing import List, Dict, Optional
+
+from testing2 import Library, Transaction
+from archive import TransactionArchive
+
+OPEN = 10 ** 9  # End ordinal for loans that have not been returned
+
+@functools.lru_cache(maxsize=65536)  # Loans share few distinct dates
+def day_number(date: str) -> int:
+    return datetime.datetime.strptime(date, "%Y-%m-%d").toordinal()
+
+# Loans as intervals [borrow day, return day): a loan is open on day T when
+# borrow <= T < return. Loans are stored in borrow order, which is also the
+# order new loans arrive in, with a max-end segment tree over them. Listing
+# open loans walks only subtrees whose max end is past T, O((k + 1) log n).
+# Per-ISBN sorted endpoint lists answer counts with two bisects, O(log n).
+class LoanHistoryIndex:
+    def __init__(self, library: Library, archive: Optional[TransactionArchive] = None):
+        self.library = library
+        self.archive = archive
+        self.build()
+        library.listeners.append(self)
+
+    def build(self):
+        tables = ["transactions"]
+        if self.archive is not None:
+            tables += self.archive.archive_tables()
+        sql = " UNION ALL ".join(
+            f"SELECT transaction_id, book_isbn, borrow_date, return_date FROM {table}" for table in tables)
+        cursor = self.library.conn.cursor()
+        cursor.execute(f"{sql} ORDER BY borrow_date, transaction_id")
+        self.ids: List[str] = []
+        self.isbns: List[str] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.positions: Dict[str, int] = {}
+        self.borrows_by_isbn: Dict[str, List[int]] = {}
+        self.returns_by_isbn: Dict[str, List[int]] = {}
+        for transaction_id, isbn, borrow_date, return_date in cursor.fetchall():
+            self._append(transaction_id, isbn, day_number(borrow_date),
+                         day_number(return_date) if return_date else OPEN, rebuild=False)
+        for returns in self.returns_by_isbn.values():
+            returns.sort()
+        self._build_tree()
+
+    def _build_tree(self):
+        capacity = 1
+        while capacity < max(1, len(self.ends)):
+            capacity *= 2
+        self.capacity = capacity
+        tree = [-1] * (2 * capacity)
+        tree[capacity:capacity + len(self.ends)] = self.ends
+        for node in range(capacity - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self.tree = tree
+
+    def _set_end(self, position: int, end: int):
+        node = position + self.capacity
+        self.tree[node] = end
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    def _append(self, transaction_id: str, isbn: str, start: int, end: int, rebuild: bool = True):
+        in_order = not self.starts or start >= self.starts[-1]
+        self.positions[transaction_id] = len(self.ids)
+        self.ids.append(transaction_id)
+        self.isbns.append(isbn)
+        self.starts.append(start)
+        self.ends.append(end)
+        bisect.insort(self.borrows_by_isbn.setdefault(isbn, []), start)
+        if end != OPEN:
+            self.returns_by_isbn.setdefault(isbn, []).append(end)
+        if not rebuild:
+            return
+        if not in_order:
+            self.build()  # Back-dated loan; rare enough to rebuild
+        elif len(self.ends) > self.capacity:
+            self._build_tree()
+        else:
+            self._set_end(len(self.ends) - 1, end)
+
+    def on_borrow(self, transaction: Transaction):
+        self._append(transaction.transaction_id, transaction.book_isbn,
+                     day_number(transaction.borrow_date), OPEN)
+
+    def on_return(self, transaction: Transaction):
+        position = self.positions.get(transaction.transaction_id)
+        if position is None:
+            return
+        end = day_number(transaction.return_date)
+        self.ends[position] = end
+        bisect.insort(self.returns_by_isbn.setdefault(transaction.book_isbn, []), end)
+        self._set_end(position, end)
+
+    def open_loans_at(self, date: str) -> List[str]:
+        day = day_number(date)
+        # Only loans borrowed on or before the day can be open on it
+        limit = bisect.bisect_right(self.starts, day)
+        found: List[int] = []
+        stack = [(1, 0, self.capacity)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self.tree[node] <= day:
+                continue
+            if high - low == 1:
+                found.append(low)
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return [self.ids[position] for position in found]
+
+    def open_count_at(self, isbn: str, date: str) -> int:
+        day = day_number(date)
+        borrowed = bisect.bisect_right(self.borrows_by_isbn.get(isbn, []), day)
+        returned = bisect.bisect_right(self.returns_by_isbn.get(isbn, []), day)
+        return borrowed - returned
+
+    def availability_at(self, isbn: str, date: str) -> Optional[int]:
+        # Uses today's copy count; copies added or withdrawn since are not replayed
+        book = self.library.books.get(isbn)
+        if book is None:
+            return None
+        return book.copies - self.open_count_at(isbn, date)
+
+    def shelf_at(self, date: str) -> Dict[str, int]:
+        return {isbn: self.availability_at(isbn, date) for isbn in self.library.books}
+
+    def show_loans_at(self, date: str):
+        loans = self.open_loans_at(date)
+        print(f"\nOpen loans on {date}: {len(loans)}")
+        for transaction_id in loans:
+            position = self.positions[transaction_id]
+            book = self.library.books.get(self.isbns[position])
+            title = book.title if book else self.isbns[position]
+            print(f"- {transaction_id}: {title} (borrowed {datetime.date.fromordinal(self.starts[position])})")
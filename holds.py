@@ -0,0 +1,202 @@
+import datetime
+import heapq
+from typing import List, Dict, Optional, Set, Tuple
+
+from testing2 import Library, Transaction
+
+class Hold:
+    def __init__(self, hold_id: int, isbn: str, member_id: str, priority: int,
+                 placed_date: str, expiry_date: str):
+        self.hold_id = hold_id
+        self.isbn = isbn
+        self.member_id = member_id
+        self.priority = priority
+        self.placed_date = placed_date
+        self.expiry_date = expiry_date
+        self.status = "waiting"  # waiting, fulfilled, cancelled, expired
+
+    def __str__(self) -> str:
+        return (f"Hold {self.hold_id}: Book {self.isbn} for Member {self.member_id} "
+                f"(Priority: {self.priority}, Expires: {self.expiry_date}, {self.status.capitalize()})")
+
+# Waiting holds live in one heap per ISBN ordered by (priority desc, hold_id),
+# so the next holder is found in O(log n); cancelled, expired and fulfilled
+# entries are dropped lazily when they reach the top. Expiry is driven by a
+# hashed timer wheel with one slot per day.
+class HoldQueue:
+    def __init__(self, library: Library, hold_days: int = 30, wheel_slots: int = 64):
+        self.library = library
+        self.conn = library.conn
+        self.cursor = self.conn.cursor()
+        self.hold_days = hold_days
+        self.holds: Dict[int, Hold] = {}
+        self.queues: Dict[str, List[Tuple[int, int]]] = {}  # isbn -> heap of (-priority, hold_id)
+        self.waiting: Dict[Tuple[str, str], int] = {}  # (isbn, member_id) -> hold_id
+        self.wheel: List[Set[int]] = [set() for _ in range(wheel_slots)]
+        self.last_sweep = datetime.date.today().toordinal() - wheel_slots
+        self.initialize_database()
+        self.load_data()
+        library.listeners.append(self)
+
+    def initialize_database(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS holds (
+                hold_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                isbn TEXT,
+                member_id TEXT,
+                priority INTEGER,
+                placed_date TEXT,
+                expiry_date TEXT,
+                status TEXT,
+                FOREIGN KEY(isbn) REFERENCES books(isbn),
+                FOREIGN KEY(member_id) REFERENCES members(member_id)
+            )
+        ''')
+        # Covers both next-holder lookups and queue position counts
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_holds_queue
+            ON holds (isbn, status, priority DESC, hold_id)
+        ''')
+        self.conn.commit()
+
+    def load_data(self):
+        self.cursor.execute('''
+            SELECT hold_id, isbn, member_id, priority, placed_date, expiry_date
+            FROM holds WHERE status = 'waiting'
+        ''')
+        for row in self.cursor.fetchall():
+            hold = Hold(*row)
+            self._track(hold)
+            self.queues.setdefault(hold.isbn, []).append((-hold.priority, hold.hold_id))
+        for heap in self.queues.values():
+            heapq.heapify(heap)
+
+    def _track(self, hold: Hold):
+        self.holds[hold.hold_id] = hold
+        self.waiting[(hold.isbn, hold.member_id)] = hold.hold_id
+        expiry = datetime.datetime.strptime(hold.expiry_date, "%Y-%m-%d").toordinal()
+        self.wheel[expiry % len(self.wheel)].add(hold.hold_id)
+
+    def _close(self, hold: Hold, status: str):
+        hold.status = status
+        del self.holds[hold.hold_id]
+        self.waiting.pop((hold.isbn, hold.member_id), None)
+        expiry = datetime.datetime.strptime(hold.expiry_date, "%Y-%m-%d").toordinal()
+        self.wheel[expiry % len(self.wheel)].discard(hold.hold_id)
+        self.cursor.execute('''
+            UPDATE holds SET status = ? WHERE hold_id = ?
+        ''', (status, hold.hold_id))
+
+    def place_hold(self, member_id: str, isbn: str, priority: int = 0) -> Optional[int]:
+        if member_id not in self.library.members:
+            print("\nMember not found!")
+            return None
+        if isbn not in self.library.books:
+            print("\nBook not found!")
+            return None
+        if self.library.books[isbn].available_copies > 0:
+            print("\nCopies are available, borrow the book instead!")
+            return None
+        if (isbn, member_id) in self.waiting:
+            print("\nMember already has a hold on this book!")
+            return None
+
+        today = datetime.date.today()
+        placed_date = today.strftime("%Y-%m-%d")
+        expiry_date = (today + datetime.timedelta(days=self.hold_days)).strftime("%Y-%m-%d")
+        self.cursor.execute('''
+            INSERT INTO holds (isbn, member_id, priority, placed_date, expiry_date, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (isbn, member_id, priority, placed_date, expiry_date, "waiting"))
+        self.conn.commit()
+        hold = Hold(self.cursor.lastrowid, isbn, member_id, priority, placed_date, expiry_date)
+        self._track(hold)
+        heapq.heappush(self.queues.setdefault(isbn, []), (-priority, hold.hold_id))
+        print(f"\nHold {hold.hold_id} placed on '{self.library.books[isbn].title}' "
+              f"(position {self.queue_position(hold.hold_id)})")
+        return hold.hold_id
+
+    def cancel_hold(self, hold_id: int) -> bool:
+        if hold_id not in self.holds:
+            print("\nHold not found!")
+            return False
+        self._close(self.holds[hold_id], "cancelled")
+        self.conn.commit()
+        print(f"\nHold {hold_id} cancelled!")
+        return True
+
+    def queue_position(self, hold_id: int) -> Optional[int]:
+        hold = self.holds.get(hold_id)
+        if hold is None:
+            return None
+        self.cursor.execute('''
+            SELECT COUNT(*) FROM holds
+            WHERE isbn = ? AND status = 'waiting'
+              AND (priority > ? OR (priority = ? AND hold_id < ?))
+        ''', (hold.isbn, hold.priority, hold.priority, hold_id))
+        return self.cursor.fetchone()[0] + 1
+
+    def queue_length(self, isbn: str) -> int:
+        self.cursor.execute('''
+            SELECT COUNT(*) FROM holds WHERE isbn = ? AND status = 'waiting'
+        ''', (isbn,))
+        return self.cursor.fetchone()[0]
+
+    def next_holder(self, isbn: str) -> Optional[Hold]:
+        heap = self.queues.get(isbn)
+        while heap:
+            hold = self.holds.get(heap[0][1])
+            if hold is not None:
+                return hold
+            heapq.heappop(heap)  # Cancelled, expired or fulfilled
+        return None
+
+    def sweep(self, today: Optional[datetime.date] = None) -> int:
+        today_ordinal = (today or datetime.date.today()).toordinal()
+        slots = len(self.wheel)
+        # Only the slots between the previous sweep and today can hold due timers
+        start = max(self.last_sweep, today_ordinal - slots + 1)
+        expired = 0
+        for day in range(start, today_ordinal + 1):
+            for hold_id in list(self.wheel[day % slots]):
+                hold = self.holds[hold_id]
+                expiry = datetime.datetime.strptime(hold.expiry_date, "%Y-%m-%d").toordinal()
+                if expiry <= today_ordinal:
+                    self._close(hold, "expired")
+                    expired += 1
+        self.last_sweep = today_ordinal
+        if expired:
+            self.conn.commit()
+        return expired
+
+    def list_holds(self, isbn: str):
+        print(f"\nHolds for {isbn}:")
+        self.cursor.execute('''
+            SELECT hold_id FROM holds WHERE isbn = ? AND status = 'waiting'
+            ORDER BY priority DESC, hold_id
+        ''', (isbn,))
+        for (hold_id,) in self.cursor.fetchall():
+            print(self.holds[hold_id])
+
+    def on_borrow(self, transaction: Transaction):
+        hold_id = self.waiting.get((transaction.book_isbn, transaction.member_id))
+        if hold_id is not None:
+            self._close(self.holds[hold_id], "fulfilled")
+
+    def on_return(self, transaction: Transaction):
+        # Runs inside return_book before it commits, so the returned copy is
+        # handed to the next holder in the same database transaction.
+        isbn = transaction.book_isbn
+        skipped = []
+        while True:
+            hold = self.next_holder(isbn)
+            if hold is None:
+                break
+            heapq.heappop(self.queues[isbn])
+            if len(self.library.members[hold.member_id].borrowed_books) >= 3:
+                skipped.append((-hold.priority, hold.hold_id))
+                continue
+            self.library.borrow_book(hold.member_id, isbn)
+            break
+        for entry in skipped:
+            heapq.heappush(self.queues[isbn], entry)
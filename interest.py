@@ -0,0 +1,226 @@
+import argparse
+import random
+import time
+import weakref
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from testing import Player, Room
+from scheduler import WorldSimulation
+from worldgen import generate_world
+
+class Region:
+    __slots__ = ("index", "rooms", "watchers", "asleep_since")
+
+    def __init__(self, index: int, rooms: List[Room], now: int):
+        self.index = index
+        self.rooms = rooms
+        self.watchers = 0  # Players whose K-hop neighbourhood reaches into this region
+        self.asleep_since: Optional[int] = now  # None while awake
+
+def partition_regions(rooms: List[Room], region_size: int) -> List[List[Room]]:
+    # Grows connected chunks of up to region_size rooms by breadth-first search
+    assigned: Set[Room] = set()
+    regions = []
+    for seed in rooms:
+        if seed in assigned:
+            continue
+        chunk = []
+        queue = deque([seed])
+        assigned.add(seed)
+        while queue and len(chunk) < region_size:
+            room = queue.popleft()
+            chunk.append(room)
+            for neighbour in room.exits.values():
+                if neighbour not in assigned:
+                    assigned.add(neighbour)
+                    queue.append(neighbour)
+        for room in queue:
+            assigned.discard(room)  # Left over when the chunk filled up; seeds a later region
+        regions.append(chunk)
+    return regions
+
+# Heals wounded enemies `amount` HP every `period` ticks. Fast-forwarding a
+# sleeping region applies the number of periods that passed in one step,
+# which lands on exactly the state per-tick updates would have produced.
+# Each enemy remembers the last tick it was healed through, so one that
+# walked in from an awake region is not healed again for the ticks it
+# spent there.
+class EnemyRecovery:
+    def __init__(self, amount: int = 1, period: int = 50):
+        self.amount = amount
+        self.period = period
+        self.last_ticked: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def tick(self, region: Region, now: int):
+        if now % self.period:
+            return
+        last_ticked = self.last_ticked
+        for room in region.rooms:
+            for enemy in room.enemies:
+                last_ticked[enemy] = now
+                if enemy.health < enemy.max_health:
+                    enemy.health = min(enemy.max_health, enemy.health + self.amount)
+
+    def fast_forward(self, region: Region, start: int, end: int):
+        # Periods falling on ticks start .. end - 1, less any the enemy
+        # already had
+        last_ticked = self.last_ticked
+        for room in region.rooms:
+            for enemy in room.enemies:
+                since = max(start, last_ticked.get(enemy, start - 1) + 1)
+                last_ticked[enemy] = end - 1
+                periods = (end - 1) // self.period - (since - 1) // self.period
+                if periods > 0 and enemy.health < enemy.max_health:
+                    enemy.health = min(enemy.max_health, enemy.health + periods * self.amount)
+
+# Splits the world into regions and only ticks regions within `hops` exits
+# of some player. A region that nobody can reach wakes up lazily: when a
+# player comes within range, each system fast-forwards it over the ticks it
+# slept through. Per-tick cost is the rooms near players, not the world.
+# Systems are objects with tick(region, now) and fast_forward(region, start, end).
+class InterestManager:
+    def __init__(self, simulation: WorldSimulation, hops: int = 2, region_size: int = 64):
+        self.simulation = simulation
+        self.game = simulation.game
+        self.hops = hops
+        self.region_size = region_size
+        self.systems: List = []
+        self.rooms = None
+        simulation.interest = self
+        simulation.wheel.every(1, self.tick)
+
+    def build(self):
+        now = self.simulation.wheel.now
+        self.rooms = self.game.rooms
+        self.regions = [Region(index, chunk, now)
+                        for index, chunk in enumerate(partition_regions(list(self.rooms.values()), self.region_size))]
+        self.room_region: Dict[Room, Region] = {room: region for region in self.regions for room in region.rooms}
+        self.awake: Set[Region] = set()
+        self.positions: Dict[Player, Room] = {}
+        self.reach_cache: Dict[Room, FrozenSet[Region]] = {}
+
+    def add_system(self, system):
+        self.systems.append(system)
+
+    def reach(self, room: Room) -> FrozenSet[Region]:
+        # Regions within `hops` exits; the room graph is static, so cached
+        reach = self.reach_cache.get(room)
+        if reach is None:
+            seen = {room}
+            frontier = [room]
+            for _ in range(self.hops):
+                next_frontier = []
+                for current in frontier:
+                    for neighbour in current.exits.values():
+                        if neighbour not in seen:
+                            seen.add(neighbour)
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            reach = self.reach_cache[room] = frozenset(self.room_region[r] for r in seen if r in self.room_region)
+        return reach
+
+    def _watch(self, room: Room, delta: int):
+        now = self.simulation.wheel.now
+        for region in self.reach(room):
+            region.watchers += delta
+            if delta > 0 and region.watchers == 1:
+                for system in self.systems:
+                    system.fast_forward(region, region.asleep_since, now)
+                region.asleep_since = None
+                self.awake.add(region)
+            elif delta < 0 and region.watchers == 0:
+                region.asleep_since = now
+                self.awake.discard(region)
+
+    def refresh(self):
+        if self.game.rooms is not self.rooms:
+            self.build()
+        players = self.simulation.players
+        if self.game.player is not None and self.game.player not in players:
+            players = players | {self.game.player}
+        positions = self.positions
+        for player in players:
+            room = player.current_room
+            old = positions.get(player)
+            if old is room:
+                continue
+            if old is not None:
+                self._watch(old, -1)
+            if room is not None:
+                self._watch(room, 1)
+                positions[player] = room
+            else:
+                del positions[player]
+        if len(positions) > len(players):
+            for player in [p for p in positions if p not in players]:
+                self._watch(positions.pop(player), -1)
+
+    def tick(self):
+        self.refresh()
+        now = self.simulation.wheel.now
+        for region in self.awake:
+            for system in self.systems:
+                system.tick(region, now)
+
+    def wake_all(self):
+        # Brings every region up to date, e.g. before saving the world
+        now = self.simulation.wheel.now
+        for region in self.regions:
+            if region.asleep_since is not None:
+                for system in self.systems:
+                    system.fast_forward(region, region.asleep_since, now)
+                region.asleep_since = now
+
+def benchmark(width: int, height: int, players: int, ticks: int, hops: int = 2,
+              region_size: int = 64, seed: int = 42) -> Dict[str, float]:
+    rng = random.Random(seed)
+    results: Dict[str, float] = {"rooms": width * height, "players": players, "ticks": ticks}
+    for managed in (False, True):
+        game = generate_world(width, height, enemy_chance=0.3, seed=seed)
+        for room in game.rooms.values():
+            for enemy in room.enemies:
+                enemy.health = 1
+        simulation = WorldSimulation(game, respawn_ticks=10 ** 6, regen_ticks=10 ** 6)
+        recovery = EnemyRecovery(period=1)
+        walkers = [Player(f"p{i}") for i in range(players)]
+        rooms = list(game.rooms.values())
+        for player in walkers:
+            player.current_room = rng.choice(rooms)
+            simulation.add_player(player)
+        if managed:
+            interest = InterestManager(simulation, hops, region_size)
+            interest.add_system(recovery)
+            interest.build()
+        else:
+            everything = Region(0, rooms, 0)
+            simulation.wheel.every(1, lambda: recovery.tick(everything, simulation.wheel.now))
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for player in walkers:
+                if rng.random() < 0.1:
+                    player.current_room = rng.choice(list(player.current_room.exits.values()))
+            simulation.wheel.advance(1)
+        elapsed = time.perf_counter() - start
+        results["managed" if managed else "full"] = elapsed / ticks
+        if managed:
+            results["awake_regions"] = len(interest.awake)
+            results["regions"] = len(interest.regions)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-world and interest-managed ticking")
+    parser.add_argument("--width", type=int, default=300)
+    parser.add_argument("--height", type=int, default=300)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--region-size", type=int, default=64)
+    args = parser.parse_args()
+    stats = benchmark(args.width, args.height, args.players, args.ticks, args.hops, args.region_size)
+    print(f"{stats['rooms']:,} rooms, {stats['players']} players: full world {stats['full'] * 1e3:.2f}ms/tick, "
+          f"interest-managed {stats['managed'] * 1e3:.2f}ms/tick "
+          f"({stats['awake_regions']}/{stats['regions']} regions awake)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from testing2 import Library
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LIBRARY_OPERATIONS = ("add_book", "add_member", "borrow_book", "return_book", "save_data",
+                      "load_data", "list_books", "list_members", "list_transactions",
+                      "generate_report", "close")
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"count": self.count, "sum": self.sum,
+                "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], self.buckets))}
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+# Collects per-operation latency histograms and SQL statement timings.
+# Nothing is recorded while `enabled` is False, and instrument_library() only
+# wraps methods when called, so an uninstrumented Library pays nothing at all.
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.operations: Dict[str, Histogram] = {}
+        self.statements: Dict[str, Histogram] = {}
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            histogram = self.operations.get(name)
+            if histogram is None:
+                histogram = self.operations[name] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_statement(self, sql: str, seconds: float):
+        key = " ".join(sql.split())[:80]
+        with self.lock:
+            histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def time(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: Optional[str] = None):
+        def decorator(func):
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(label, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self.lock:
+            self.operations.clear()
+            self.statements.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self.lock:
+            return {
+                "operations": {name: h.snapshot() for name, h in self.operations.items()},
+                "statements": {sql: h.snapshot() for sql, h in self.statements.items()},
+            }
+
+    def _histogram_lines(self, metric: str, label: str, histograms: Dict[str, Histogram]) -> List[str]:
+        lines = [f"# TYPE {metric} histogram"]
+        for name, histogram in sorted(histograms.items()):
+            value = _label(name)
+            cumulative = 0
+            for bound, count in zip([str(bound) for bound in BUCKETS] + ["+Inf"], histogram.buckets):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum}')
+            lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+        return lines
+
+    def prometheus_text(self) -> str:
+        with self.lock:
+            lines = self._histogram_lines("library_operation_seconds", "operation", self.operations)
+            lines += self._histogram_lines("library_sql_statement_seconds", "statement", self.statements)
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.prometheus_text())
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> HTTPServer:
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+REGISTRY = MetricsRegistry(enabled=False)
+
+# Stands in for the store's write cursor and times every statement it runs
+class TimedCursor:
+    def __init__(self, cursor, registry: MetricsRegistry):
+        self.cursor = cursor
+        self.registry = registry
+
+    def execute(self, sql: str, parameters=()):
+        if not self.registry.enabled:
+            return self.cursor.execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return self.cursor.execute(sql, parameters)
+        finally:
+            self.registry.observe_statement(sql, time.perf_counter() - start)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        if not self.registry.enabled:
+            return self.cursor.executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return self.cursor.executemany(sql, seq_of_parameters)
+        finally:
+            self.registry.observe_statement(sql, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+def instrument_library(library: Library, registry: MetricsRegistry = REGISTRY,
+                       operations: Tuple[str, ...] = LIBRARY_OPERATIONS) -> Library:
+    # Wraps the bound methods on this instance only; other Library objects
+    # and the class itself are untouched.
+    for name in operations:
+        setattr(library, name, registry.timed(name)(getattr(library, name)))
+    store = library.store
+    if not isinstance(store.writer, TimedCursor):
+        store.writer = TimedCursor(store.writer, registry)
+        query = store.query
+
+        def timed_query(sql: str, parameters=(), row_factory=None):
+            if not registry.enabled:
+                return query(sql, parameters, row_factory)
+            start = time.perf_counter()
+            try:
+                return query(sql, parameters, row_factory)
+            finally:
+                registry.observe_statement(sql, time.perf_counter() - start)
+        store.query = timed_query
+    return library
+
+def open_library(db_name: str = "library.db", registry: MetricsRegistry = REGISTRY) -> Library:
+    # Library.__init__ runs load_data itself, so startup is timed as a whole
+    with registry.time("startup"):
+        library = Library(db_name)
+    return instrument_library(library, registry)
@@ -0,0 +1,385 @@
+import asyncio
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from testing import Game, Player, Room, Enemy, Command, CommandRegistry, WORD, TEXT
+from scheduler import WorldSimulation
+from interest import InterestManager, EnemyRecovery
+from enemy_ai import EnemyAI
+
+PROMPT = "\n> "  # Ends every command response; the load generator waits for it
+MAX_PENDING = 256 * 1024  # Bytes queued for one client before it is dropped as too slow
+
+class NetPlayer(Player):
+    # Player.take_damage ends the process on death; on a server only the
+    # player's session should notice
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.dead = False
+
+    def take_damage(self, damage: int):
+        actual_damage = max(0, damage - self.armor)
+        self.health -= actual_damage
+        print(f"\n{self.name} takes {actual_damage} damage!")
+        if self.health <= 0:
+            print(f"\n{self.name} has been defeated!")
+            self.dead = True
+
+class Session:
+    def __init__(self, server: "MudServer", reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.player: Optional[NetPlayer] = None
+        self.combat: Optional[asyncio.Task] = None
+        self.closed = False
+        self.pending: List[bytes] = []
+
+    def send(self, text: str):
+        if text:
+            self.write(text.replace("\n", "\r\n").encode())
+
+    def write(self, data: bytes):
+        # Output is collected and handed to the socket once per event loop
+        # pass, so a response plus every broadcast that lands in the same
+        # pass cost one send() instead of one each
+        if self.closed:
+            return
+        if not self.pending:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.pending.append(data)
+
+    def flush(self):
+        # Never awaits: the transport buffers, and clients that stop reading
+        # are dropped instead of stalling everyone else
+        data = b"".join(self.pending)
+        self.pending.clear()
+        transport = self.writer.transport
+        if self.closed or transport.is_closing():
+            return  # Peer went away; its read loop will clean up
+        transport.write(data)
+        if transport.get_write_buffer_size() > MAX_PENDING:
+            self.close()
+
+    def run(self, func: Callable, *args):
+        # Game and Player report through print(); capture it for this client.
+        # Handlers never await, so no other session can interleave output.
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            result = func(*args)
+        self.send(buffer.getvalue())
+        return result
+
+    def close(self):
+        if not self.closed:
+            if self.pending:
+                self.flush()
+            self.closed = True
+            self.writer.close()
+
+# Hosts any number of players in one Game world. Each connection is a
+# coroutine that reads a line, dispatches it synchronously (handlers are
+# plain method calls that finish in microseconds) and writes the response
+# without waiting for the client. Combat runs as a task per fight that
+# sleeps between rounds with asyncio.sleep instead of time.sleep.
+class MudServer:
+    def __init__(self, game: Optional[Game] = None, round_delay: float = 1.0,
+                 simulation: Optional[WorldSimulation] = None):
+        self.game = game or Game()
+        if not self.game.rooms:
+            self.game.setup_game()
+        self.round_delay = round_delay
+        self.simulation = simulation
+        self.sessions: Set[Session] = set()
+        self.occupants: Dict[Room, Set[Session]] = {room: set() for room in self.game.rooms.values()}
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        register = self.commands.register
+        register("look", self.cmd_look, aliases=("l",), description="Describe the room")
+        register("go", self.cmd_go, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.cmd_take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.cmd_use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.cmd_attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("say", self.cmd_say, aliases=("'",), args=TEXT, required=True,
+                 usage="say [text]", description="Talk to the room")
+        register("who", self.cmd_who, description="List players online")
+        register("inventory", self.cmd_inventory, aliases=("i",), description="Show inventory")
+        register("status", self.cmd_status, description="Show player status")
+        register("help", self.cmd_help, aliases=("?",), description="Show commands")
+        register("quit", self.cmd_quit, description="Disconnect", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
+        self.commands_handled = 0
+        self.rendered: Dict[Room, Tuple[str, bytes]] = {}  # Room text and its encoded form
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.ticker: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 4000, backlog: int = 1024) -> asyncio.AbstractServer:
+        # asyncio's default backlog of 100 drops handshakes when hundreds of
+        # players connect at once, leaving them waiting on SYN-ACK retries
+        self.server = await asyncio.start_server(self.handle, host, port, backlog=backlog)
+        if self.simulation is not None:
+            self.ticker = asyncio.get_running_loop().create_task(self.tick())
+        return self.server
+
+    async def tick(self):
+        while True:
+            self.simulation.catch_up()
+            await asyncio.sleep(self.simulation.tick_seconds)
+
+    def broadcast(self, room: Room, text: str, exclude: Optional[Session] = None):
+        # Encoded once for the whole room
+        data = f"\n{text}".replace("\n", "\r\n").encode()
+        for session in list(self.occupants.get(room, ())):
+            if session is not exclude:
+                session.write(data)
+
+    def enter(self, session: Session, room: Room):
+        self.occupants.setdefault(room, set()).add(session)
+        self.broadcast(room, f"{session.player.name} arrives.", exclude=session)
+
+    def leave(self, session: Session, room: Room, message: str):
+        self.occupants.get(room, set()).discard(session)
+        self.broadcast(room, message)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session(self, reader, writer)
+        self.sessions.add(session)
+        try:
+            session.send("Welcome to Dungeon Adventure!\nEnter your character's name: ")
+            name = (await reader.readline()).decode("utf-8", "replace").strip()[:32]
+            if not name:
+                return
+            session.player = NetPlayer(name)
+            session.player.current_room = self.game.rooms["entrance"]
+            if self.simulation is not None:
+                self.simulation.add_player(session.player)
+            self.enter(session, session.player.current_room)
+            session.send("\nType 'help' for commands.")
+            self.cmd_look(session)
+            session.send(PROMPT)
+            while not session.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.dispatch(session, line.decode("utf-8", "replace").strip())
+        except (ConnectionError, ValueError):
+            pass  # Reset connection, or a line longer than the stream limit
+        finally:
+            if session.combat is not None:
+                session.combat.cancel()
+            if session.player is not None:
+                self.leave(session, session.player.current_room, f"{session.player.name} has left.")
+                if self.simulation is not None:
+                    self.simulation.remove_player(session.player)
+            self.sessions.discard(session)
+            session.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()  # Collects a broken-pipe error instead of logging it
+
+    def dispatch(self, session: Session, line: str):
+        if self.commands.dispatch(session, line):
+            self.commands_handled += 1
+        session.send(PROMPT)
+
+    def unknown_command(self, session: Session, word: str, matches: List[str]):
+        if len(matches) > 1:
+            session.send(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            session.send("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, session: Session, command: Command):
+        session.send(f"\nUsage: {command.usage}")
+
+    def render(self, room: Room) -> bytes:
+        # Room.render returns the same string until the room changes, so the
+        # encoded copy is reused until then
+        text = room.render()
+        cached = self.rendered.get(room)
+        if cached is None or cached[0] is not text:
+            cached = self.rendered[room] = (text, f"\n{text}\n".replace("\n", "\r\n").encode())
+        return cached[1]
+
+    def cmd_look(self, session: Session):
+        room = session.player.current_room
+        session.write(self.render(room))
+        others = [other.player.name for other in self.occupants.get(room, ()) if other is not session]
+        if others:
+            session.send("\nAlso here: " + ", ".join(sorted(others)))
+
+    def cmd_go(self, session: Session, direction: str):
+        old_room = session.player.current_room
+        if session.run(self.game.move, session.player, direction):
+            self.leave(session, old_room, f"{session.player.name} leaves {direction}.")
+            self.enter(session, session.player.current_room)
+            self.cmd_look(session)
+
+    def cmd_take(self, session: Session, item_name: str):
+        if session.run(self.game.take, session.player, item_name):
+            self.broadcast(session.player.current_room,
+                           f"{session.player.name} picks up {session.player.inventory[-1].name}.", exclude=session)
+
+    def cmd_use(self, session: Session, item_name: str):
+        session.run(self.game.use, session.player, item_name)
+
+    def cmd_attack(self, session: Session, enemy_name: str):
+        if session.combat is not None:
+            session.send("\nYou are already fighting!")
+            return
+        enemy = self.game.find_enemy(session.player.current_room, enemy_name)
+        if enemy is None:
+            session.send("\nNo such enemy in the room!")
+            return
+        session.send(f"\nCombat begins: {session.player.name} vs {enemy.name}!")
+        self.broadcast(session.player.current_room, f"{session.player.name} attacks the {enemy.name}!",
+                       exclude=session)
+        session.combat = asyncio.get_running_loop().create_task(self.fight(session, enemy))
+
+    async def fight(self, session: Session, enemy: Enemy):
+        player = session.player
+        room = player.current_room
+        try:
+            while True:
+                # Another player may have finished the enemy, or this one walked away
+                if enemy not in room.enemies or player.current_room is not room:
+                    break
+                if session.run(self.game.player_attack, player, enemy):
+                    room.enemies.remove(enemy)
+                    self.broadcast(room, f"{player.name} has defeated the {enemy.name}!", exclude=session)
+                    break
+                await asyncio.sleep(self.round_delay)
+                if enemy not in room.enemies or player.current_room is not room:
+                    break
+                session.run(self.game.enemy_attack, enemy, player)
+                if player.dead:
+                    self.respawn(session)
+                    break
+                await asyncio.sleep(self.round_delay)
+        finally:
+            session.combat = None
+        session.send(PROMPT)
+
+    def enemy_moved(self, enemy: Enemy, old_room: Room, new_room: Room):
+        self.broadcast(old_room, f"The {enemy.name} wanders off.")
+        self.broadcast(new_room, f"A {enemy.name} arrives.")
+
+    def respawn(self, session: Session):
+        player = session.player
+        self.leave(session, player.current_room, f"{player.name} has fallen!")
+        player.health = player.max_health
+        player.dead = False
+        player.current_room = self.game.rooms["entrance"]
+        self.enter(session, player.current_room)
+        session.send("\nYou awaken at the entrance.")
+
+    def cmd_say(self, session: Session, text: str):
+        session.send(f"\nYou say: {text}")
+        self.broadcast(session.player.current_room, f"{session.player.name} says: {text}", exclude=session)
+
+    def cmd_who(self, session: Session):
+        names = sorted(other.player.name for other in self.sessions if other.player is not None)
+        session.send(f"\n{len(names)} player(s) online: " + ", ".join(names[:50]) +
+                     (" ..." if len(names) > 50 else ""))
+
+    def cmd_inventory(self, session: Session):
+        session.run(session.player.show_inventory)
+
+    def cmd_status(self, session: Session):
+        session.run(session.player.show_status)
+
+    def cmd_help(self, session: Session):
+        session.send("\nCommands:\n" + "\n".join(self.commands.help_lines()))
+
+    def cmd_quit(self, session: Session):
+        session.send("\nThanks for playing!\n")
+        session.close()
+
+# Load generator: each simulated client logs in, then sends commands back to
+# back, timing each one from send until its prompt comes back.
+LOAD_COMMANDS = ["look", "go north", "go south", "go east", "go west", "status", "inventory",
+                 "say hello", "who"]
+
+async def load_client(host: str, port: int, name: str, deadline: float, latencies: List[float], seed: int):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    prompt = PROMPT.replace("\n", "\r\n").encode()
+    try:
+        await reader.readuntil(b": ")
+        writer.write(f"{name}\r\n".encode())
+        await reader.readuntil(prompt)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(f"{rng.choice(LOAD_COMMANDS)}\r\n".encode())
+            await reader.readuntil(prompt)
+            latencies.append(time.perf_counter() - start)
+        writer.write(b"quit\r\n")
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+async def run_load(clients: int, duration: float, host: Optional[str] = None, port: int = 4000) -> Dict[str, float]:
+    server = None
+    if host is None:
+        # No server given: host one in this process on a free port
+        server = await MudServer().start("127.0.0.1", 0)
+        host, port = "127.0.0.1", server.sockets[0].getsockname()[1]
+    latencies: List[float] = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(load_client(host, port, f"bot{i}", deadline, latencies, i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+    return {"clients": clients, "commands": len(latencies), "seconds": elapsed,
+            "commands_per_sec": len(latencies) / elapsed, "p50": percentile(0.50),
+            "p95": percentile(0.95), "p99": percentile(0.99), "max": latencies[-1] if latencies else 0.0}
+
+async def serve(host: str, port: int):
+    game = Game()
+    game.setup_game()
+    simulation = WorldSimulation(game)
+    interest = InterestManager(simulation)
+    interest.add_system(EnemyRecovery())
+    mud = MudServer(game, simulation=simulation)
+    EnemyAI(simulation, interest=interest).on_move = mud.enemy_moved
+    server = await mud.start(host, port)
+    print(f"Dungeon Adventure server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Multiplayer Dungeon Adventure over TCP")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Run the server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=4000)
+    load = sub.add_parser("load", help="Drive a server with simulated players")
+    load.add_argument("--clients", type=int, default=200)
+    load.add_argument("--duration", type=float, default=10.0)
+    load.add_argument("--host", help="Server to load; omit to host one in-process")
+    load.add_argument("--port", type=int, default=4000)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port))
+    else:
+        stats = asyncio.run(run_load(args.clients, args.duration, args.host, args.port))
+        print(f"{stats['clients']} clients, {stats['commands']:,} commands in {stats['seconds']:.1f}s: "
+              f"{stats['commands_per_sec']:,.0f} commands/s, p50 {stats['p50'] * 1e3:.2f}ms, "
+              f"p95 {stats['p95'] * 1e3:.2f}ms, p99 {stats['p99'] * 1e3:.2f}ms, max {stats['max'] * 1e3:.2f}ms")
+
+if __name__ == "__main__":
+    main()
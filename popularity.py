@@ -0,0 +1,241 @@
+import datetime
+import argparse
+import math
+import random
+import time
+from typing import List, Dict, Optional, Tuple
+
+from testing2 import Library, Transaction
+
+# Keeps the best `size` keys by score, best first. Scores handed to update()
+# must never decrease for a key, which lets a key outside the list be
+# rejected by comparing against the current last entry only.
+class TopK:
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: List[Tuple[float, str]] = []
+
+    def update(self, key: str, score: float):
+        entries = self.entries
+        for i, (_, existing) in enumerate(entries):
+            if existing == key:
+                del entries[i]
+                break
+        else:
+            if len(entries) >= self.size and score <= entries[-1][0]:
+                return
+        position = 0
+        while position < len(entries) and entries[position][0] >= score:
+            position += 1
+        entries.insert(position, (score, key))
+        del entries[self.size:]
+
+    def items(self, k: int) -> List[Tuple[str, float]]:
+        return [(key, score) for score, key in self.entries[:k]]
+
+# Exponentially decayed borrow counts use forward decay: each borrow adds
+# exp(rate * (day - landmark)) to a book's stored score, so stored scores only
+# grow and the decayed value at any time is the stored score scaled by
+# exp(-rate * (now - landmark)). Scores and monthly counts are materialized in
+# SQLite, so startup reads one row per book instead of the loan history.
+class PopularityEngine:
+    def __init__(self, library: Library, half_life_days: float = 14.0, top_k: int = 50):
+        self.library = library
+        self.conn = library.conn
+        self.cursor = self.conn.cursor()
+        self.rate = math.log(2) / half_life_days
+        self.top_k = top_k
+        self.landmark = datetime.date.today().toordinal()
+        self.scores: Dict[str, float] = {}
+        self.month = datetime.date.today().strftime("%Y-%m")
+        self.month_counts: Dict[str, int] = {}
+        self.day_numbers: Dict[str, int] = {}  # Parsed borrow dates; loans cluster on few dates
+        self.trending = TopK(top_k)
+        self.monthly = TopK(top_k)
+        self.initialize_database()
+        self.load_data()
+        library.listeners.append(self)
+
+    def initialize_database(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS book_popularity (
+                isbn TEXT PRIMARY KEY,
+                score REAL,
+                FOREIGN KEY(isbn) REFERENCES books(isbn)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS popularity_landmark (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                landmark INTEGER
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS monthly_borrows (
+                month TEXT,
+                isbn TEXT,
+                borrows INTEGER,
+                PRIMARY KEY (month, isbn)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_monthly_borrows_rank ON monthly_borrows (month, borrows DESC)
+        ''')
+        self.conn.commit()
+
+    def load_data(self):
+        self.cursor.execute("SELECT landmark FROM popularity_landmark WHERE id = 1")
+        row = self.cursor.fetchone()
+        if row is None:
+            self.rebuild()
+            return
+        self.landmark = row[0]
+        self.cursor.execute("SELECT isbn, score FROM book_popularity")
+        self.scores = dict(self.cursor.fetchall())
+        self.cursor.execute('''
+            SELECT isbn, borrows FROM monthly_borrows WHERE month = ?
+        ''', (self.month,))
+        self.month_counts = dict(self.cursor.fetchall())
+        self._rank()
+
+    def _rank(self):
+        self.trending = TopK(self.top_k)
+        self.monthly = TopK(self.top_k)
+        for isbn, score in self.scores.items():
+            self.trending.update(isbn, score)
+        for isbn, borrows in self.month_counts.items():
+            self.monthly.update(isbn, borrows)
+
+    def rebuild(self):
+        # Single pass over the loan history; only needed once per database
+        self.scores.clear()
+        self.month_counts.clear()
+        monthly: Dict[Tuple[str, str], int] = {}
+        self.cursor.execute("SELECT book_isbn, borrow_date FROM transactions")
+        while True:
+            rows = self.cursor.fetchmany(10000)
+            if not rows:
+                break
+            for isbn, borrow_date in rows:
+                day = datetime.datetime.strptime(borrow_date, "%Y-%m-%d").toordinal()
+                self.scores[isbn] = self.scores.get(isbn, 0.0) + math.exp(self.rate * (day - self.landmark))
+                key = (borrow_date[:7], isbn)
+                monthly[key] = monthly.get(key, 0) + 1
+        self.month_counts = {isbn: count for (month, isbn), count in monthly.items() if month == self.month}
+        self.cursor.execute("DELETE FROM book_popularity")
+        self.cursor.executemany('''
+            INSERT INTO book_popularity (isbn, score) VALUES (?, ?)
+        ''', self.scores.items())
+        self.cursor.execute("DELETE FROM monthly_borrows")
+        self.cursor.executemany('''
+            INSERT INTO monthly_borrows (month, isbn, borrows) VALUES (?, ?, ?)
+        ''', ((month, isbn, count) for (month, isbn), count in monthly.items()))
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO popularity_landmark (id, landmark) VALUES (1, ?)
+        ''', (self.landmark,))
+        self.conn.commit()
+        self._rank()
+
+    def _rebase(self, day: int):
+        # Moves the landmark forward before exp() overflows; rescaling every
+        # score by the same factor keeps the ranking unchanged.
+        factor = math.exp(-self.rate * (day - self.landmark))
+        self.scores = {isbn: score * factor for isbn, score in self.scores.items()}
+        self.landmark = day
+        self.cursor.execute("UPDATE book_popularity SET score = score * ?", (factor,))
+        self.cursor.execute("UPDATE popularity_landmark SET landmark = ? WHERE id = 1", (day,))
+        self._rank()
+
+    def record(self, isbn: str, borrow_date: str):
+        day = self.day_numbers.get(borrow_date)
+        if day is None:
+            day = datetime.datetime.strptime(borrow_date, "%Y-%m-%d").toordinal()
+            self.day_numbers[borrow_date] = day
+        if self.rate * (day - self.landmark) > 500:
+            self._rebase(day)
+        score = self.scores.get(isbn, 0.0) + math.exp(self.rate * (day - self.landmark))
+        self.scores[isbn] = score
+        self.trending.update(isbn, score)
+        month = borrow_date[:7]
+        if month > self.month:
+            self.month = month
+            self.month_counts = {}
+            self.monthly = TopK(self.top_k)
+        if month == self.month:
+            borrows = self.month_counts.get(isbn, 0) + 1
+            self.month_counts[isbn] = borrows
+            self.monthly.update(isbn, borrows)
+        self.cursor.execute('''
+            INSERT INTO book_popularity (isbn, score) VALUES (?, ?)
+            ON CONFLICT(isbn) DO UPDATE SET score = excluded.score
+        ''', (isbn, score))
+        self.cursor.execute('''
+            INSERT INTO monthly_borrows (month, isbn, borrows) VALUES (?, ?, 1)
+            ON CONFLICT(month, isbn) DO UPDATE SET borrows = borrows + 1
+        ''', (month, isbn))
+
+    def on_borrow(self, transaction: Transaction):
+        self.record(transaction.book_isbn, transaction.borrow_date)
+
+    def on_return(self, transaction: Transaction):
+        pass
+
+    def decayed_score(self, isbn: str, on: Optional[datetime.date] = None) -> float:
+        day = (on or datetime.date.today()).toordinal()
+        return self.scores.get(isbn, 0.0) * math.exp(-self.rate * (day - self.landmark))
+
+    def top_trending(self, k: int = 10, on: Optional[datetime.date] = None) -> List[Tuple[str, float]]:
+        day = (on or datetime.date.today()).toordinal()
+        factor = math.exp(-self.rate * (day - self.landmark))
+        return [(isbn, score * factor) for isbn, score in self.trending.items(k)]
+
+    def most_borrowed(self, month: Optional[str] = None, k: int = 10) -> List[Tuple[str, int]]:
+        month = month or datetime.date.today().strftime("%Y-%m")
+        if month == self.month and k <= self.top_k:
+            return [(isbn, int(borrows)) for isbn, borrows in self.monthly.items(k)]
+        self.cursor.execute('''
+            SELECT isbn, borrows FROM monthly_borrows WHERE month = ?
+            ORDER BY borrows DESC LIMIT ?
+        ''', (month, k))
+        return self.cursor.fetchall()
+
+    def report(self, k: int = 5):
+        print("\nTrending Books:")
+        for isbn, score in self.top_trending(k):
+            book = self.library.books.get(isbn)
+            print(f"- {book.title if book else isbn} (Score: {score:.2f})")
+        print("Most Borrowed This Month:")
+        for isbn, borrows in self.most_borrowed(k=k):
+            book = self.library.books.get(isbn)
+            print(f"- {book.title if book else isbn} ({borrows} borrows)")
+
+def benchmark(transactions: int, books: int, seed: int = 42):
+    library = Library(":memory:")
+    engine = PopularityEngine(library)
+    rng = random.Random(seed)
+    start_day = datetime.date.today().toordinal() - 3 * 365
+    # Zipf-like skew so a few titles dominate, as in real circulation
+    weights = [1.0 / (rank + 1) for rank in range(books)]
+    isbns = [f"{i:013d}" for i in range(books)]
+    events = sorted(zip((start_day + rng.randrange(3 * 365) for _ in range(transactions)),
+                        rng.choices(isbns, weights, k=transactions)))
+    start = time.perf_counter()
+    for day, isbn in events:
+        engine.record(isbn, datetime.date.fromordinal(day).strftime("%Y-%m-%d"))
+    library.conn.commit()
+    elapsed = time.perf_counter() - start
+    print(f"Recorded {transactions:,} borrows in {elapsed:.2f}s ({transactions / elapsed:,.0f}/s)")
+    start = time.perf_counter()
+    for _ in range(10000):
+        engine.top_trending(10)
+        engine.most_borrowed(k=10)
+    elapsed = time.perf_counter() - start
+    print(f"Top-10 trending + monthly query: {elapsed / 10000 * 1e6:.1f} us")
+    library.conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the popularity engine")
+    parser.add_argument("--transactions", type=int, default=10_000_000)
+    parser.add_argument("--books", type=int, default=100_000)
+    args = parser.parse_args()
+    benchmark(args.transactions, args.books)
@@ -0,0 +1,118 @@
+from typing import List, Dict, Set, Tuple
+
+from testing2 import Library, Transaction
+
+# Item-to-item "borrowed together" index. Two ISBNs co-occur once for every
+# member who has borrowed both. Pair counts are kept sparsely per ISBN and a
+# top-K neighbour list is maintained next to them, so a lookup never sorts.
+# Counts only ever grow, which keeps incremental top-K maintenance exact.
+class CoBorrowIndex:
+    def __init__(self, library: Library, top_k: int = 10, max_basket: int = 500):
+        self.library = library
+        self.top_k = top_k
+        self.max_basket = max_basket  # Caps the pairs generated by very heavy borrowers
+        self.baskets: Dict[str, Set[str]] = {}  # member_id -> distinct ISBNs borrowed
+        self.counts: Dict[str, Dict[str, int]] = {}  # isbn -> {neighbour isbn: co-borrow count}
+        self.top: Dict[str, List[Tuple[int, str]]] = {}  # isbn -> [(count, neighbour)] best first
+        self.build()
+        library.listeners.append(self)
+
+    def build(self):
+        self.baskets.clear()
+        self.counts.clear()
+        cursor = self.library.conn.cursor()
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transactions_member ON transactions (member_id)
+        ''')
+        # One streaming pass: rows arrive grouped by member, so only the
+        # current member's basket is expanded into pairs at a time.
+        cursor.execute('''
+            SELECT member_id, book_isbn FROM transactions ORDER BY member_id
+        ''')
+        current = None
+        basket: Set[str] = set()
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for member_id, isbn in rows:
+                if member_id != current:
+                    self._add_basket(basket)
+                    if current is not None:
+                        self.baskets[current] = basket
+                    current, basket = member_id, set()
+                if len(basket) < self.max_basket:
+                    basket.add(isbn)
+        self._add_basket(basket)
+        if current is not None:
+            self.baskets[current] = basket
+        self.top = {isbn: self._rank(neighbours) for isbn, neighbours in self.counts.items()}
+
+    def _add_basket(self, basket: Set[str]):
+        items = sorted(basket)
+        for i, a in enumerate(items):
+            row_a = self.counts.setdefault(a, {})
+            for b in items[i + 1:]:
+                row_a[b] = row_a.get(b, 0) + 1
+                row_b = self.counts.setdefault(b, {})
+                row_b[a] = row_b.get(a, 0) + 1
+
+    def _rank(self, neighbours: Dict[str, int]) -> List[Tuple[int, str]]:
+        ranked = sorted(((count, isbn) for isbn, count in neighbours.items()),
+                        key=lambda entry: (-entry[0], entry[1]))
+        return ranked[:self.top_k]
+
+    def _bump(self, isbn: str, neighbour: str):
+        row = self.counts.setdefault(isbn, {})
+        count = row.get(neighbour, 0) + 1
+        row[neighbour] = count
+        top = self.top.setdefault(isbn, [])
+        key = (-count, neighbour)
+        for i, (_, existing) in enumerate(top):
+            if existing == neighbour:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.top_k and key >= (-top[-1][0], top[-1][1]):
+                return
+        # Lists are at most top_k long, so a linear insert is cheaper than a heap
+        position = 0
+        while position < len(top) and (-top[position][0], top[position][1]) < key:
+            position += 1
+        top.insert(position, (count, neighbour))
+        del top[self.top_k:]
+
+    def on_borrow(self, transaction: Transaction):
+        basket = self.baskets.setdefault(transaction.member_id, set())
+        isbn = transaction.book_isbn
+        if isbn in basket or len(basket) >= self.max_basket:
+            return
+        for other in basket:
+            self._bump(isbn, other)
+            self._bump(other, isbn)
+        basket.add(isbn)
+
+    def on_return(self, transaction: Transaction):
+        pass
+
+    def also_borrowed(self, isbn: str, k: int = 5) -> List[Tuple[str, int]]:
+        return [(neighbour, count) for count, neighbour in self.top.get(isbn, [])[:k]]
+
+    def recommend_for_member(self, member_id: str, k: int = 5) -> List[Tuple[str, int]]:
+        basket = self.baskets.get(member_id, set())
+        scores: Dict[str, int] = {}
+        for isbn in basket:
+            for count, neighbour in self.top.get(isbn, []):
+                if neighbour not in basket:
+                    scores[neighbour] = scores.get(neighbour, 0) + count
+        return sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))[:k]
+
+    def show_also_borrowed(self, isbn: str, k: int = 5):
+        if isbn not in self.library.books:
+            print("\nBook not found!")
+            return
+        print(f"\nMembers who borrowed '{self.library.books[isbn].title}' also borrowed:")
+        for neighbour, count in self.also_borrowed(isbn, k):
+            book = self.library.books.get(neighbour)
+            title = book.title if book else neighbour
+            print(f"- {title} ({count} members)")
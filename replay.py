@@ -0,0 +1,269 @@
+import argparse
+import hashlib
+import io
+import json
+import random
+import time
+from collections import deque
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List, Optional, Tuple
+
+from testing import Game, Player
+
+FORMAT_VERSION = 2
+CHECKPOINT_EVERY = 50  # Commands between state hashes
+
+class ReplayError(Exception):
+    pass
+
+class _Discard(io.TextIOBase):
+    # Swallows print() output during headless runs
+    def write(self, text: str) -> int:
+        return len(text)
+
+# Fingerprint of everything a command can change: the player, the contents
+# of every room and the random streams. Two runs that agree on it will keep
+# agreeing on every later command.
+def state_hash(game: Game) -> str:
+    player = game.player
+    keys = {room: key for key, room in game.rooms.items()}
+    state = {
+        "player": [player.name, player.health, player.max_health, player.gold, player.attack_power,
+                   player.armor, player.level, player.experience, player.exp_to_next_level,
+                   keys.get(player.current_room), [item.name for item in player.inventory]],
+        "rooms": {key: [[item.name for item in room.items], [[enemy.id, enemy.name, enemy.health] for enemy in room.enemies]]
+                  for key, room in game.rooms.items()},
+        "rng": game.rng.state(),
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+
+def _hook_streams(game: Game, wrap: Callable[[str, random.Random], None]):
+    # Wraps the game's current streams and, through on_create, every one made
+    # later, including the fresh Random objects RandomStreams.restore builds
+    for name, rng in game.rng.streams.items():
+        wrap(name, rng)
+    game.rng.on_create = wrap
+
+# Writes one session to a text log, one record per line:
+#   #session <version> <header JSON>   player name and starting RNG state
+#   c <command>                        a line of input, before it runs
+#   s <id> <stream>                    first use of a random stream
+#   r <id> <value>                     a draw from stream <id>
+#   h <commands> <hash>                state_hash after that many commands
+# The file is flushed after every command, so a crash loses nothing already
+# played. Draws are recorded so a replay can name the first roll that differs.
+# `load` is refused while recording: the log could not reproduce the file it
+# read. Sessions with a WorldSimulation attached follow the wall clock and
+# will not replay exactly.
+class SessionRecorder:
+    def __init__(self, game: Game, filename: str, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.game = game
+        self.file = open(filename, "w", encoding="utf-8")  # One session per log
+        self.checkpoint_every = checkpoint_every
+        self.commands = 0
+        self.checkpointed = -1
+        self.stream_ids: Dict[str, int] = {}
+        self.started = False
+        handle = game.handle
+        load = game.commands.resolve("load")
+
+        def recorded_handle(line: str):
+            words = line.split()
+            if words and game.commands.resolve(words[0]) is load:
+                print("\nLoading is disabled while this session is being recorded.")
+                return
+            if not self.started:
+                self._write_header()
+            self.file.write(f"c {line.strip()}\n")
+            try:
+                handle(line)
+            finally:
+                self.commands += 1
+                if self.commands % self.checkpoint_every == 0:
+                    self.checkpoint()
+                self.file.flush()
+        game.handle = recorded_handle
+        _hook_streams(game, self._watch)
+
+    def _write_header(self):
+        self.started = True
+        header = {"player": self.game.player.name, "rng": self.game.rng.state()}
+        self.file.write(f"#session {FORMAT_VERSION} {json.dumps(header, separators=(',', ':'))}\n")
+
+    def _watch(self, name: str, rng: random.Random):
+        randint = rng.randint
+        write = self.file.write
+        stream_ids = self.stream_ids
+
+        def recorded_randint(a: int, b: int) -> int:
+            value = randint(a, b)
+            stream_id = stream_ids.get(name)
+            if stream_id is None:
+                stream_id = stream_ids[name] = len(stream_ids)
+                write(f"s {stream_id} {name}\n")
+            write(f"r {stream_id} {value}\n")
+            return value
+        rng.randint = recorded_randint  # Game draws only through randint
+
+    def checkpoint(self):
+        self.file.write(f"h {self.commands} {state_hash(self.game)}\n")
+        self.checkpointed = self.commands
+
+    def start(self):
+        # Game.start with the log closed however the session ends
+        try:
+            self.game.start()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.started and self.checkpointed != self.commands:
+            self.checkpoint()
+        self.file.close()
+
+# Re-runs a recorded session with no input, printing or combat delays. Every
+# draw is checked against the log as it happens and every checkpoint hash is
+# compared, so divergence is reported at the command that caused it. `save`
+# commands are skipped so a replay never writes files, and a `load` (which
+# the recorder refuses) stops the replay with an error.
+class SessionReplayer:
+    def __init__(self, filename: str):
+        with open(filename, encoding="utf-8") as f:
+            first = f.readline()
+            if not first.startswith("#session "):
+                raise ReplayError(f"{filename} is not a session log")
+            _, version, header = first.rstrip("\n").split(" ", 2)
+            if int(version) != FORMAT_VERSION:
+                raise ReplayError(f"unsupported session log version {version}")
+            self.header = json.loads(header)
+            # Per command: its text, the draws it made and the hash recorded after it
+            self.commands: List[Tuple[str, List[Tuple[str, int]], Optional[str]]] = []
+            names: Dict[str, str] = {}
+            for line in f:
+                kind, _, rest = line.rstrip("\n").partition(" ")
+                if kind == "c":
+                    self.commands.append((rest, [], None))
+                elif kind == "s":
+                    stream_id, name = rest.split(" ", 1)
+                    names[stream_id] = name
+                elif kind == "r":
+                    stream_id, value = rest.split(" ")
+                    self.commands[-1][1].append((names[stream_id], int(value)))
+                elif kind == "#session":
+                    raise ReplayError(f"{filename} holds more than one session")
+                elif kind == "h":
+                    count, digest = rest.split(" ")
+                    text, draws, _ = self.commands[int(count) - 1]
+                    self.commands[int(count) - 1] = (text, draws, digest)
+
+    def checkpoints(self) -> List[int]:
+        return [index + 1 for index, (_, _, digest) in enumerate(self.commands) if digest is not None]
+
+    def new_game(self) -> Game:
+        game = Game()
+        game.turn_delay = 0
+        game.setup_game()
+        game.player = Player(self.header["player"])
+        game.player.current_room = game.rooms["entrance"]
+        game.running = True
+        game.rng.restore(self.header["rng"])
+        return game
+
+    def run(self, until: Optional[int] = None, verify: bool = True) -> Game:
+        # Plays the first `until` commands (all of them by default) and
+        # returns the game in the state they left it
+        game = self.new_game()
+        expected: deque = deque()
+        position = [0]
+        if verify:
+            def check(name: str, rng: random.Random):
+                randint = rng.randint
+
+                def checked_randint(a: int, b: int) -> int:
+                    value = randint(a, b)
+                    want = expected.popleft() if expected else None
+                    if want != (name, value):
+                        raise ReplayError(f"command {position[0] + 1}: drew {value} from {name}, "
+                                          f"log has {want}")
+                    return value
+                rng.randint = checked_randint
+            _hook_streams(game, check)
+        commands = self.commands if until is None else self.commands[:until]
+        save, load = game.commands.resolve("save"), game.commands.resolve("load")
+        with redirect_stdout(_Discard()):
+            for index, (text, draws, digest) in enumerate(commands):
+                position[0] = index
+                expected.extend(draws)
+                words = text.split()
+                # Matched the way the registry matches it, so "SAVE" is skipped too
+                command = game.commands.resolve(words[0]) if words else None
+                if command is load:
+                    raise ReplayError(f"command {index + 1}: the log loads a save, which cannot be replayed")
+                try:
+                    if command is not save:
+                        game.handle(text)
+                except SystemExit:
+                    break  # The player died; nothing after this in the log ran either
+                if verify:
+                    if expected:
+                        raise ReplayError(f"command {index + 1}: {len(expected)} logged draws never happened")
+                    if digest is not None and state_hash(game) != digest:
+                        raise ReplayError(f"command {index + 1}: state hash differs from the log")
+        return game
+
+def _bot_session(filename: str, commands: int, seed: int) -> int:
+    # Records a random-command session, as a stand-in for a real player
+    bot = random.Random(seed)
+    moves = ["go north", "go south", "go east", "go west", "take sword", "take shield", "take health potion",
+             "take treasure chest", "use health potion", "attack goblin", "attack skeleton", "attack troll",
+             "status", "inventory", "look around"]
+    game = Game(seed)
+    game.turn_delay = 0
+    game.setup_game()
+    game.player = Player("bot")
+    game.player.current_room = game.rooms["entrance"]
+    recorder = SessionRecorder(game, filename)
+    played = 0
+    with redirect_stdout(_Discard()):
+        try:
+            for played in range(1, commands + 1):
+                move = bot.choice(moves)
+                player = game.player
+                if move.startswith("attack") and (player.health < 60 or (move == "attack troll" and not player.armor)):
+                    move = "status"  # Stays alive long enough to make a useful log
+                game.handle(move)
+        except SystemExit:
+            pass
+        finally:
+            recorder.close()
+    return played
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded game sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    play = sub.add_parser("replay", help="Replay a session log and verify it")
+    play.add_argument("log")
+    play.add_argument("--until", type=int, help="Stop after this many commands, e.g. a checkpoint")
+    play.add_argument("--no-verify", action="store_true")
+    bench = sub.add_parser("bench", help="Record a random session, then time its replay")
+    bench.add_argument("--log", default="session.log")
+    bench.add_argument("--commands", type=int, default=100_000)
+    bench.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.command == "bench":
+        played = _bot_session(args.log, args.commands, args.seed)
+        print(f"Recorded {played:,} commands to {args.log}")
+        log = args.log
+        until, verify = None, True
+    else:
+        log, until, verify = args.log, args.until, not args.no_verify
+    replayer = SessionReplayer(log)
+    start = time.perf_counter()
+    game = replayer.run(until, verify)
+    elapsed = time.perf_counter() - start
+    count = len(replayer.commands) if until is None else min(until, len(replayer.commands))
+    print(f"Replayed {count:,} commands in {elapsed:.2f}s ({count / elapsed:,.0f}/s), "
+          f"{len(replayer.checkpoints())} checkpoints, final state {state_hash(game)}")
+
+if __name__ == "__main__":
+    main()
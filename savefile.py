@@ -0,0 +1,282 @@
+import argparse
+import gc
+import json
+import lzma
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from itertools import chain, islice
+from typing import Dict, List, Optional
+
+from testing import Game, Player, Room, Item, Enemy
+
+MAGIC = b"DGSV"
+VERSION = 2
+HEADER = struct.Struct("<4sBB")  # magic, format version, compression
+SECTIONS = struct.Struct("<QQQ")  # byte lengths of the string table, the integers and the metadata
+RAW, ZLIB, LZMA = 0, 1, 2
+
+class SaveFormatError(Exception):
+    pass
+
+def _compress(data: bytes, compression: int) -> bytes:
+    # Low levels: on a million-room world zlib level 6 takes six times as
+    # long as level 1 for a file 15% smaller, and lzma gains little past 0
+    if compression == ZLIB:
+        return zlib.compress(data, 1)
+    if compression == LZMA:
+        return lzma.compress(data, preset=0)
+    return data
+
+def _decompress(data: bytes, compression: int) -> bytes:
+    if compression == ZLIB:
+        return zlib.decompress(data)
+    if compression == LZMA:
+        return lzma.decompress(data)
+    if compression == RAW:
+        return data
+    raise SaveFormatError(f"unknown compression {compression}")
+
+def _player_state(game: Game, room_index: Dict[Room, int]) -> Optional[Dict]:
+    player = game.player
+    if player is None:
+        return None
+    return {"name": player.name, "health": player.health, "max_health": player.max_health, "gold": player.gold,
+            "attack_power": player.attack_power, "armor": player.armor, "level": player.level,
+            "experience": player.experience, "exp_to_next_level": player.exp_to_next_level,
+            "current_room": room_index.get(player.current_room),
+            "inventory": [[item.name, item.description, item.value, item.damage] for item in player.inventory]}
+
+def _restore_player(game: Game, state: Optional[Dict], rooms: List[Room]):
+    if state is None:
+        game.player = None
+        return
+    player = Player(state["name"])
+    for field in ("health", "max_health", "gold", "attack_power", "armor", "level", "experience",
+                  "exp_to_next_level"):
+        setattr(player, field, state[field])
+    player.inventory = [Item(*fields) for fields in state["inventory"]]
+    if state["current_room"] is not None:
+        player.current_room = rooms[state["current_room"]]
+    game.player = player
+
+# Binary world save. After the header comes one compressed body with three
+# sections: a block of NUL-terminated strings, a run of little-endian int32
+# columns, and a small JSON block for the player, the random streams and the
+# column lengths. The string block holds every room key, then every room
+# name, then a table of the repeated strings (descriptions, directions, item
+# and enemy names). The int columns are, in order:
+#   description per room (table index)    exit count per room
+#   direction per exit (table index)      target room index per exit
+#   item count per room                   name, description, value, damage per item
+#   enemy count per room                  id, name, health, max health, attack, exp, gold per enemy
+# An enemy without an id is stored as -1. A string containing NUL would
+# shift every string after it, so saving one raises SaveFormatError, and a
+# load checks the string count against the metadata.
+# Columns are built and read with comprehensions and slices rather than a
+# Python call per field.
+class BinaryCodec:
+    def __init__(self, compression: int = ZLIB):
+        self.compression = compression
+
+    def encode(self, game: Game) -> bytes:
+        keys = list(game.rooms)
+        rooms = list(game.rooms.values())
+        room_index = {room: index for index, room in enumerate(rooms)}
+        descriptions = [room.description for room in rooms]
+        directions = [direction for room in rooms for direction in room.exits]
+        items = [item for room in rooms for item in room.items]
+        enemies = [enemy for room in rooms for enemy in room.enemies]
+        table = list(dict.fromkeys(chain(descriptions, directions, [item.name for item in items],
+                                         [item.description for item in items], [enemy.name for enemy in enemies])))
+        ids = {text: index for index, text in enumerate(table)}.__getitem__
+        ints = array("i", map(ids, descriptions))
+        ints.extend([len(room.exits) for room in rooms])
+        ints.extend(map(ids, directions))
+        ints.extend([room_index[target] for room in rooms for target in room.exits.values()])
+        ints.extend([len(room.items) for room in rooms])
+        ints.extend([value for item in items
+                     for value in (ids(item.name), ids(item.description), item.value, item.damage)])
+        ints.extend([len(room.enemies) for room in rooms])
+        ints.extend([value for enemy in enemies
+                     for value in (-1 if enemy.id is None else enemy.id, ids(enemy.name), enemy.health,
+                                   enemy.max_health, enemy.attack, enemy.exp_reward, enemy.gold_reward)])
+        if sys.byteorder == "big":
+            ints.byteswap()
+        strings = 2 * len(rooms) + len(table)
+        text = "\0".join(chain(keys, (room.name for room in rooms), table, [""]))
+        if text.count("\0") != strings:
+            raise SaveFormatError("room keys, names and other saved strings may not contain NUL")
+        text = text.encode()
+        numbers = ints.tobytes()
+        meta = json.dumps({"rooms": len(rooms), "strings": strings, "exits": len(directions),
+                           "items": len(items), "enemies": len(enemies), "player": _player_state(game, room_index),
+                           "next_enemy_id": game.next_enemy_id, "rng": game.rng.state()},
+                          separators=(",", ":")).encode()
+        body = SECTIONS.pack(len(text), len(numbers), len(meta)) + text + numbers + meta
+        return HEADER.pack(MAGIC, VERSION, self.compression) + _compress(body, self.compression)
+
+    def decode(self, data: bytes, game: Game) -> Game:
+        magic, version, compression = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise SaveFormatError("not a binary save")
+        if version != VERSION:
+            raise SaveFormatError(f"unsupported save version {version}")
+        body = _decompress(data[HEADER.size:], compression)
+        text_size, numbers_size, meta_size = SECTIONS.unpack_from(body)
+        start = SECTIONS.size
+        strings = body[start:start + text_size].decode().split("\0")[:-1]  # Empty after the last NUL
+        start += text_size
+        numbers = array("i")
+        numbers.frombytes(body[start:start + numbers_size])
+        if sys.byteorder == "big":
+            numbers.byteswap()
+        meta = json.loads(body[start + numbers_size:start + numbers_size + meta_size])
+        count, exit_count, item_count, enemy_count = meta["rooms"], meta["exits"], meta["items"], meta["enemies"]
+        if len(strings) != meta["strings"]:
+            raise SaveFormatError(f"expected {meta['strings']} strings, found {len(strings)}")
+        keys, names, table = strings[:count], strings[count:2 * count], strings[2 * count:]
+        ints = numbers.tolist()
+        columns = []
+        position = 0
+        for size in (count, count, exit_count, exit_count, count, 4 * item_count, count, 7 * enemy_count):
+            columns.append(ints[position:position + size])
+            position += size
+        descriptions, exits_per_room, directions, targets, items_per_room, item_fields, \
+            enemies_per_room, enemy_fields = columns
+
+        rooms = list(map(Room, names, map(table.__getitem__, descriptions)))
+        # A fresh room has nothing rendered yet, so its exits can be set directly
+        exits = zip(map(table.__getitem__, directions), map(rooms.__getitem__, targets))
+        for room, exit_total in zip(rooms, exits_per_room):
+            if exit_total:
+                room.exits = dict(islice(exits, exit_total))
+        items = iter(list(map(Item, map(table.__getitem__, item_fields[0::4]),
+                              map(table.__getitem__, item_fields[1::4]), item_fields[2::4], item_fields[3::4])))
+        for room, item_total in zip(rooms, items_per_room):
+            if item_total:
+                room.items.extend(islice(items, item_total))
+        enemies = list(map(Enemy, map(table.__getitem__, enemy_fields[1::7]), enemy_fields[3::7],
+                           enemy_fields[4::7], enemy_fields[5::7], enemy_fields[6::7]))
+        for enemy, enemy_id, health in zip(enemies, enemy_fields[0::7], enemy_fields[2::7]):
+            enemy.health = health
+            if enemy_id >= 0:
+                enemy.id = enemy_id
+        enemies = iter(enemies)
+        for room, enemy_total in zip(rooms, enemies_per_room):
+            if enemy_total:
+                room.enemies.extend(islice(enemies, enemy_total))
+        game.rooms = dict(zip(keys, rooms))
+        game.next_enemy_id = meta["next_enemy_id"]
+        _restore_player(game, meta["player"], rooms)
+        game.rng.restore(meta["rng"])
+        return game
+
+# The same world as compact JSON, for tools that want to read saves. Rooms
+# are listed in order and exits name their target by that position.
+class JsonCodec:
+    def encode(self, game: Game) -> bytes:
+        rooms = list(game.rooms.items())
+        room_index = {room: index for index, (_, room) in enumerate(rooms)}
+        state = {
+            "version": VERSION,
+            "rooms": [[key, room.name, room.description,
+                       {direction: room_index[target] for direction, target in room.exits.items()},
+                       [[item.name, item.description, item.value, item.damage] for item in room.items],
+                       [[enemy.id, enemy.name, enemy.health, enemy.max_health, enemy.attack,
+                         enemy.exp_reward, enemy.gold_reward] for enemy in room.enemies]]
+                      for key, room in rooms],
+            "player": _player_state(game, room_index),
+            "next_enemy_id": game.next_enemy_id,
+            "rng": game.rng.state(),
+        }
+        return json.dumps(state, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes, game: Game) -> Game:
+        state = json.loads(data)
+        if state.get("version") != VERSION:
+            raise SaveFormatError(f"unsupported save version {state.get('version')}")
+        rooms = [Room(name, description) for _, name, description, _, _, _ in state["rooms"]]
+        for room, (_, _, _, exits, items, enemies) in zip(rooms, state["rooms"]):
+            for direction, target in exits.items():
+                room.add_exit(direction, rooms[target])
+            for fields in items:
+                room.items.append(Item(*fields))
+            for enemy_id, name, health, max_health, attack, exp_reward, gold_reward in enemies:
+                enemy = Enemy(name, max_health, attack, exp_reward, gold_reward)
+                enemy.id = enemy_id
+                enemy.health = health
+                room.enemies.append(enemy)
+        game.rooms = {entry[0]: room for entry, room in zip(state["rooms"], rooms)}
+        game.next_enemy_id = state["next_enemy_id"]
+        _restore_player(game, state["player"], rooms)
+        game.rng.restore(state["rng"])
+        return game
+
+CODECS = {"json": JsonCodec(), "raw": BinaryCodec(RAW), "zlib": BinaryCodec(ZLIB), "lzma": BinaryCodec(LZMA)}
+
+class _PausedGC:
+    # Building or reading a world allocates millions of objects, each of
+    # which would count toward a cyclic collection that finds nothing
+    def __enter__(self):
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            gc.enable()
+
+def save_world(game: Game, filename: str, codec: str = "zlib") -> int:
+    # Writes the whole world, player and random streams; returns the file size
+    with _PausedGC():
+        data = CODECS[codec].encode(game)
+    with open(filename, "wb") as f:
+        f.write(data)
+    return len(data)
+
+def load_world(filename: str, game: Optional[Game] = None) -> Game:
+    # Reads either codec; binary saves are recognised by their magic bytes
+    with open(filename, "rb") as f:
+        data = f.read()
+    game = game or Game()
+    codec = CODECS["zlib"] if data.startswith(MAGIC) else CODECS["json"]
+    with _PausedGC():
+        return codec.decode(data, game)
+
+def benchmark(width: int, height: int, codecs: List[str], directory: str = ".", seed: int = 42) -> List[Dict]:
+    from worldgen import generate_world
+
+    game = generate_world(width, height, seed=seed)
+    game.player = Player("bench")
+    game.player.current_room = game.rooms["entrance"]
+    results = []
+    for name in codecs:
+        filename = os.path.join(directory, f"bench_world.{name}")
+        start = time.perf_counter()
+        size = save_world(game, filename, name)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = load_world(filename)
+        elapsed = time.perf_counter() - start
+        os.remove(filename)
+        assert len(loaded.rooms) == len(game.rooms)
+        results.append({"codec": name, "rooms": len(game.rooms), "bytes": size, "save": saved, "load": elapsed})
+        del loaded
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare world save codecs")
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=1000)
+    parser.add_argument("--codecs", default="json,raw,zlib,lzma", help="Comma-separated: " + ", ".join(CODECS))
+    parser.add_argument("--dir", default=".", help="Where to write the temporary save files")
+    args = parser.parse_args()
+    for stats in benchmark(args.width, args.height, args.codecs.split(","), args.dir):
+        print(f"{stats['codec']:>5}: {stats['rooms']:,} rooms, {stats['bytes'] / 1e6:7.1f} MB, "
+              f"save {stats['save']:.2f}s, load {stats['load']:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from testing import Game, Player, Room, Enemy
+
+SLOT_BITS = 8
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+LEVELS = 4  # 2**32 ticks of range; at 10 ticks/s that is over 13 years
+
+class Timer:
+    __slots__ = ("expiry", "callback", "args", "interval", "cancelled")
+
+    def __init__(self, expiry: int, callback: Callable, args: tuple, interval: int = 0):
+        self.expiry = expiry
+        self.callback = callback
+        self.args = args
+        self.interval = interval  # Repeats every `interval` ticks when non-zero
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+# Hierarchical timing wheel, as in the Linux kernel timers: level k has 256
+# slots of 256**k ticks each. Scheduling drops a timer into one slot, O(1).
+# Each tick runs one level-0 slot; when level k wraps, the next level-(k+1)
+# slot is cascaded down, so a timer is moved at most LEVELS - 1 times.
+# Cancelling only flags the timer; it is skipped when its slot comes due.
+class TimingWheel:
+    def __init__(self, now: int = 0):
+        self.now = now
+        self.wheels: List[List[List[Timer]]] = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.pending = 0
+        self.fired = 0
+
+    def schedule(self, delay: int, callback: Callable, *args) -> Timer:
+        timer = Timer(self.now + max(1, delay), callback, args)
+        self._insert(timer)
+        return timer
+
+    def every(self, interval: int, callback: Callable, *args) -> Timer:
+        timer = Timer(self.now + max(1, interval), callback, args, max(1, interval))
+        self._insert(timer)
+        return timer
+
+    def _insert(self, timer: Timer):
+        expiry = timer.expiry
+        delta = expiry - self.now
+        if delta < SLOTS:
+            self.wheels[0][expiry & SLOT_MASK].append(timer)
+        elif delta < 1 << (2 * SLOT_BITS):
+            self.wheels[1][(expiry >> SLOT_BITS) & SLOT_MASK].append(timer)
+        elif delta < 1 << (3 * SLOT_BITS):
+            self.wheels[2][(expiry >> (2 * SLOT_BITS)) & SLOT_MASK].append(timer)
+        elif delta < 1 << (4 * SLOT_BITS):
+            self.wheels[3][(expiry >> (3 * SLOT_BITS)) & SLOT_MASK].append(timer)
+        else:
+            raise ValueError(f"delay of {delta} ticks is beyond the wheel's range")
+        self.pending += 1
+
+    def _cascade(self, level: int):
+        wheel = self.wheels[level]
+        index = (self.now >> (level * SLOT_BITS)) & SLOT_MASK
+        timers = wheel[index]
+        if timers:
+            wheel[index] = []
+            self.pending -= len(timers)
+            for timer in timers:
+                if not timer.cancelled:
+                    self._insert(timer)
+
+    def advance(self, ticks: int = 1) -> int:
+        # Returns how many timers fired
+        fired = 0
+        wheel0 = self.wheels[0]
+        for _ in range(ticks):
+            self.now += 1
+            now = self.now
+            if not now & SLOT_MASK:
+                for level in range(1, LEVELS):
+                    self._cascade(level)
+                    if (now >> (level * SLOT_BITS)) & SLOT_MASK:
+                        break
+            index = now & SLOT_MASK
+            timers = wheel0[index]
+            if not timers:
+                continue
+            wheel0[index] = []
+            self.pending -= len(timers)
+            for timer in timers:
+                if timer.cancelled:
+                    continue
+                fired += 1
+                timer.callback(*timer.args)
+                if timer.interval and not timer.cancelled:
+                    timer.expiry = self.now + timer.interval
+                    self._insert(timer)
+        self.fired += fired
+        return fired
+
+class Effect:
+    def __init__(self, name: str, target, per_tick: int, remaining: int):
+        self.name = name
+        self.target = target
+        self.per_tick = per_tick  # Health change applied every period; negative hurts
+        self.remaining = remaining  # Periods left
+        self.timer: Optional[Timer] = None
+
+# Runs the world on game ticks instead of player input. Defeated enemies come
+# back in their home room after `respawn_ticks`, players regenerate
+# `regen_amount` HP every `regen_ticks`, and timed effects (poison,
+# regeneration, ...) tick until they run out. World time follows the wall
+# clock: catch_up() advances however many ticks have passed, so the input
+# loop can call it between commands and a server can call it from a task.
+class WorldSimulation:
+    def __init__(self, game: Game, tick_seconds: float = 0.1, respawn_ticks: int = 600,
+                 regen_ticks: int = 50, regen_amount: int = 5):
+        self.game = game
+        self.tick_seconds = tick_seconds
+        self.respawn_ticks = respawn_ticks
+        self.regen_ticks = regen_ticks
+        self.regen_amount = regen_amount
+        self.wheel = TimingWheel()
+        self.players: Set[Player] = set()
+        self.homes: Dict[Enemy, Room] = {}
+        self.effects: Dict[Player, Dict[str, Effect]] = {}
+        self.rooms = None
+        self.started = time.monotonic()
+        self.wheel.every(regen_ticks, self.regenerate)
+        original = game.player_attack
+
+        def player_attack(player: Player, enemy: Enemy) -> bool:
+            defeated = original(player, enemy)
+            if defeated:
+                self.enemy_defeated(enemy)
+            return defeated
+        game.player_attack = player_attack
+        game.simulation = self
+
+    def attach(self):
+        # setup_game builds a fresh rooms dict; remember where each enemy lives
+        self.rooms = self.game.rooms
+        self.homes = {enemy: room for room in self.rooms.values() for enemy in room.enemies}
+
+    def catch_up(self, now: Optional[float] = None) -> int:
+        if self.game.rooms is not self.rooms:
+            self.attach()
+        if self.game.player is not None:
+            self.players.add(self.game.player)
+        target = int(((now if now is not None else time.monotonic()) - self.started) / self.tick_seconds)
+        if target <= self.wheel.now:
+            return 0
+        return self.wheel.advance(target - self.wheel.now)
+
+    def add_player(self, player: Player):
+        self.players.add(player)
+
+    def remove_player(self, player: Player):
+        self.players.discard(player)
+        for effect in self.effects.pop(player, {}).values():
+            effect.timer.cancel()
+
+    def enemy_defeated(self, enemy: Enemy):
+        room = self.homes.pop(enemy, None)
+        if room is not None:
+            self.wheel.schedule(self.respawn_ticks, self.respawn, enemy, room)
+
+    def respawn(self, enemy: Enemy, room: Room):
+        fresh = Enemy(enemy.name, enemy.max_health, enemy.attack, enemy.exp_reward, enemy.gold_reward)
+        fresh.id = enemy.id  # Takes over the same spawn's id and random stream
+        room.add_enemy(fresh)
+        self.homes[fresh] = room
+
+    def regenerate(self):
+        amount = self.regen_amount
+        for player in self.players:
+            if 0 < player.health < player.max_health:
+                player.health = min(player.max_health, player.health + amount)
+
+    def add_effect(self, player: Player, name: str, per_tick: int, periods: int, period_ticks: int = 10):
+        # Re-applying an effect restarts it rather than stacking
+        effects = self.effects.setdefault(player, {})
+        if name in effects:
+            effects[name].timer.cancel()
+        effect = Effect(name, player, per_tick, periods)
+        effect.timer = self.wheel.every(period_ticks, self._tick_effect, effect)
+        effects[name] = effect
+        return effect
+
+    def _tick_effect(self, effect: Effect):
+        player = effect.target
+        if player.health > 0:
+            player.health = max(0, min(player.max_health, player.health + effect.per_tick))
+        effect.remaining -= 1
+        if effect.remaining <= 0 or player.health <= 0:
+            effect.timer.cancel()
+            self.effects.get(player, {}).pop(effect.name, None)
+
+def benchmark(events: int, max_delay: int = 100_000, seed: int = 42) -> Dict[str, float]:
+    rng = random.Random(seed)
+    wheel = TimingWheel()
+    delays = [rng.randint(1, max_delay) for _ in range(events)]
+    counter = [0]
+
+    def fire():
+        counter[0] += 1
+    start = time.perf_counter()
+    for delay in delays:
+        wheel.schedule(delay, fire)
+    scheduled = time.perf_counter() - start
+    start = time.perf_counter()
+    wheel.advance(max_delay)
+    advanced = time.perf_counter() - start
+    assert counter[0] == events
+    return {"events": events, "ticks": max_delay, "schedule_per_event": scheduled / events,
+            "advance": advanced, "expire_per_event": advanced / events}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the world timing wheel")
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--max-delay", type=int, default=100_000, help="Ticks; delays are uniform up to this")
+    args = parser.parse_args()
+    stats = benchmark(args.events, args.max_delay)
+    print(f"{stats['events']:,} timers over {stats['ticks']:,} ticks: schedule {stats['schedule_per_event'] * 1e9:.0f}ns, "
+          f"expire {stats['expire_per_event'] * 1e9:.0f}ns per timer ({stats['advance']:.2f}s to drain)")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -88,22 +91,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -118,25 +177,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -169,9 +441,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -180,26 +453,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -209,42 +580,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -260,90 +648,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -429,22 +760,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -459,25 +846,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -510,9 +1110,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -521,26 +1122,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -550,42 +1249,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -601,90 +1317,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -770,22 +1429,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -800,25 +1515,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -851,9 +1779,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -862,26 +1791,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -891,42 +1918,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -942,90 +1986,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -1111,22 +2098,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -1141,25 +2184,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -1192,9 +2448,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -1203,26 +2460,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -1232,42 +2587,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -1283,90 +2655,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -1452,22 +2767,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -1482,25 +2853,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -1533,9 +3117,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -1544,26 +3129,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -1573,42 +3256,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -1624,90 +3324,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -1793,22 +3436,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -1823,25 +3522,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -1874,9 +3786,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -1885,26 +3798,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -1914,42 +3925,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -1965,90 +3993,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -2134,22 +4105,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -2164,25 +4191,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -2215,9 +4455,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -2226,26 +4467,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -2255,42 +4594,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -2306,90 +4662,33 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
 import random
 import time
 import sys
+import io
 import json
-from typing import Dict, List, Optional
+import hashlib
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
 
 class Item:
     def __init__(self, name: str, description: str, value: int, damage: int = 0):
@@ -2475,22 +4774,78 @@ class Enemy:
         self.attack = attack
         self.exp_reward = exp_reward
         self.gold_reward = gold_reward
+        self.id: Optional[int] = None  # Given by Game.identify; names the enemy's random stream
 
     def take_damage(self, damage: int) -> bool:
         self.health -= damage
         print(f"\n{self.name} takes {damage} damage! ({self.health}/{self.max_health} HP)")
         return self.health <= 0
 
+class RoomContents(list):
+    # A room's items or enemies; any change drops the room's cached rendering
+    __slots__ = ("room",)
+
+    def __init__(self, room: 'Room'):
+        super().__init__()
+        self.room = room
+
+    def append(self, value):
+        self.room.rendered = None
+        super().append(value)
+
+    def extend(self, values):
+        self.room.rendered = None
+        super().extend(values)
+
+    def insert(self, index, value):
+        self.room.rendered = None
+        super().insert(index, value)
+
+    def remove(self, value):
+        self.room.rendered = None
+        super().remove(value)
+
+    def pop(self, index=-1):
+        self.room.rendered = None
+        return super().pop(index)
+
+    def clear(self):
+        self.room.rendered = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self.room.rendered = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self.room.rendered = None
+        super().reverse()
+
+    def __setitem__(self, index, value):
+        self.room.rendered = None
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.room.rendered = None
+        super().__delitem__(index)
+
+    def __iadd__(self, values):
+        self.room.rendered = None
+        return super().__iadd__(values)
+
 class Room:
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.exits: Dict[str, Room] = {}
-        self.items: List[Item] = []
-        self.enemies: List[Enemy] = []
+        self.exits: Dict[str, Room] = {}  # Change through add_exit so the rendering is refreshed
+        self.items: List[Item] = RoomContents(self)
+        self.enemies: List[Enemy] = RoomContents(self)
+        self.rendered: Optional[str] = None
+        self.rendered_health: tuple = ()
 
     def add_exit(self, direction: str, room: 'Room'):
         self.exits[direction] = room
+        self.rendered = None
 
     def add_item(self, item: Item):
         self.items.append(item)
@@ -2505,25 +4860,238 @@ class Room:
                 return item
         return None
 
+    def render(self) -> str:
+        # The text describe() prints, kept until the room's items, enemies or
+        # exits change. Enemy health changes without touching the room, so it
+        # is compared on every call.
+        health = tuple([enemy.health for enemy in self.enemies]) if self.enemies else ()
+        if self.rendered is None or health != self.rendered_health:
+            lines = [self.name, self.description]
+            if self.items:
+                lines.append("Items in the room:")
+                lines.extend([f"- {item.name}: {item.description}" for item in self.items])
+            if self.enemies:
+                lines.append("Enemies in the room:")
+                lines.extend([f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)" for enemy in self.enemies])
+            if self.exits:
+                lines.append("Exits: " + ", ".join(self.exits.keys()))
+            self.rendered = "\n".join(lines)
+            self.rendered_health = health
+        return self.rendered
+
     def describe(self):
-        print(f"\n{self.name}")
-        print(self.description)
-        if self.items:
-            print("Items in the room:")
-            for item in self.items:
-                print(f"- {item.name}: {item.description}")
-        if self.enemies:
-            print("Enemies in the room:")
-            for enemy in self.enemies:
-                print(f"- {enemy.name} ({enemy.health}/{enemy.max_health} HP)")
-        if self.exits:
-            print("Exits:", ", ".join(self.exits.keys()))
+        print(f"\n{self.render()}")
+
+class BufferedOutput(io.TextIOBase):
+    # Collects print() output so a command's response reaches the terminal
+    # in one write
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return len(text)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        return text
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(self.drain())
+        self.stream.flush()
+
+# Named random streams derived from one root seed. Each subsystem or entity
+# draws from its own stream, so what one draws never shifts another's
+# numbers, and the root seed plus the commands played reproduce a session.
+# split() hands out a child with its own root, e.g. one per parallel
+# worker; derived seeds come from a hash of the names, so they don't overlap.
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.streams: Dict[str, random.Random] = {}
+        # Called with every stream as it is made, restored ones included, so
+        # a recorder can wrap its draws
+        self.on_create: Optional[Callable[[str, random.Random], None]] = None
+
+    def derive(self, name: str) -> int:
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def stream(self, name: str) -> random.Random:
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(self.derive(name))
+            if self.on_create is not None:
+                self.on_create(name, rng)
+        return rng
+
+    def split(self, name: str) -> 'RandomStreams':
+        return RandomStreams(self.derive("split/" + name))
+
+    def state(self) -> Dict:
+        streams = {}
+        for name, rng in self.streams.items():
+            version, internal, gauss = rng.getstate()
+            streams[name] = [version, list(internal), gauss]
+        return {"seed": self.seed, "streams": streams}
+
+    def restore(self, state: Dict):
+        self.seed = state["seed"]
+        self.streams = {}
+        for name, (version, internal, gauss) in state["streams"].items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+NO_ARGS, WORD, TEXT = "none", "word", "text"  # How a command reads what follows its name
+
+class Command:
+    def __init__(self, name: str, handler: Callable, args: str = NO_ARGS, required: bool = False,
+                 usage: str = "", description: str = ""):
+        self.name = name
+        self.handler = handler  # handler(actor) for NO_ARGS, handler(actor, arg) otherwise
+        self.args = args
+        self.required = required
+        self.usage = usage or name
+        self.description = description
+
+    def run(self, actor, words: List[str]):
+        if self.args == NO_ARGS:
+            return self.handler(actor)
+        # A word argument is matched case-insensitively; text is kept as typed
+        arg = words[0].lower() if self.args == WORD and words else " ".join(words)
+        return self.handler(actor, arg)
+
+class _TrieNode:
+    __slots__ = ("children", "commands")
 
-class Game:
     def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.commands: set = set()  # Every command reachable by a key through this node
+
+# Maps command words to handlers. Names, aliases and shortcuts ("n" for
+# "go north") go into a trie; any prefix under which only one command lives
+# resolves to it, and exact keys always win. The trie is flattened into a
+# dict of every accepted word, so dispatch is one lookup however many
+# commands there are. Front ends supply the actor (a Player, a network
+# session, ...) and the two hooks that report mistakes in their own way.
+class CommandRegistry:
+    def __init__(self, on_unknown: Callable[[object, str, List[str]], None],
+                 on_usage: Callable[[object, Command], None]):
+        self.on_unknown = on_unknown  # on_unknown(actor, word, matches); several matches means ambiguous
+        self.on_usage = on_usage  # on_usage(actor, command) when a required argument is missing
+        self.commands: List[Command] = []
+        self.keys: Dict[str, Command] = {}
+        self.root = _TrieNode()
+        self.lookup: Optional[Dict[str, Command]] = None
+
+    def register(self, name: str, handler: Callable, aliases: Tuple[str, ...] = (), args: str = NO_ARGS,
+                 required: bool = False, usage: str = "", description: str = "",
+                 abbreviate: bool = True) -> Command:
+        # abbreviate=False makes the command answer to its exact keys only
+        command = Command(name, handler, args, required, usage, description)
+        self.commands.append(command)
+        for key in (name,) + tuple(aliases):
+            self._add_key(key, command, abbreviate)
+        return command
+
+    def shortcut(self, key: str, name: str, arg: str) -> Command:
+        # A key that runs another command with a fixed argument
+        target = self.keys[name]
+        command = Command(key, lambda actor: target.handler(actor, arg), usage=f"{key} = {name} {arg}")
+        self._add_key(key, command, abbreviate=False)
+        return command
+
+    def _add_key(self, key: str, command: Command, abbreviate: bool):
+        key = key.lower()
+        if key in self.keys:
+            raise ValueError(f"command key {key!r} is already taken by {self.keys[key].name!r}")
+        self.keys[key] = command
+        if abbreviate:
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.commands.add(command)
+        self.lookup = None
+
+    def _build(self) -> Dict[str, Command]:
+        lookup = {}
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if prefix and len(node.commands) == 1:
+                lookup[prefix] = next(iter(node.commands))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char))
+        lookup.update(self.keys)
+        self.lookup = lookup
+        return lookup
+
+    def resolve(self, word: str) -> Optional[Command]:
+        lookup = self.lookup if self.lookup is not None else self._build()
+        return lookup.get(word.lower())
+
+    def matches(self, word: str) -> List[str]:
+        # Keys starting with word, for "did you mean" messages
+        word = word.lower()
+        return sorted(key for key in self.keys if key.startswith(word))
+
+    def dispatch(self, actor, line: str) -> bool:
+        # Returns whether a command ran
+        words = line.split()
+        if not words:
+            return False
+        command = self.resolve(words[0])
+        if command is None:
+            self.on_unknown(actor, words[0], self.matches(words[0]))
+            return False
+        if command.required and len(words) == 1:
+            self.on_usage(actor, command)
+            return False
+        command.run(actor, words[1:])
+        return True
+
+    def run(self, actor, name: str, arg: str = ""):
+        # Calls a command directly by its exact key, for bots and servers
+        # that already know what they want
+        command = self.keys[name]
+        return command.handler(actor) if command.args == NO_ARGS else command.handler(actor, arg)
+
+    def help_lines(self) -> List[str]:
+        return [f"{command.usage} - {command.description}" for command in self.commands]
+
+class Game:
+    def __init__(self, seed: Optional[int] = None):
         self.player = None
         self.rooms: Dict[str, Room] = {}
         self.running = False
+        self.rng = RandomStreams(seed)
+        self.next_enemy_id = 0
+        self.turn_delay = 1.0  # Seconds between combat turns; 0 for headless runs
+        self.simulation = None  # Optional WorldSimulation (scheduler.py) advanced between commands
+        self.commands = CommandRegistry(self.unknown_command, self.command_usage)
+        self.register_commands()
+
+    def register_commands(self):
+        register = self.commands.register
+        register("go", self.move, aliases=("walk",), args=WORD, required=True,
+                 usage="go [direction]", description="Move to another room")
+        register("take", self.take, aliases=("get",), args=TEXT, required=True,
+                 usage="take [item]", description="Pick up an item")
+        register("use", self.use, args=TEXT, required=True, usage="use [item]", description="Use an item")
+        register("attack", self.attack, aliases=("kill",), args=TEXT, required=True,
+                 usage="attack [enemy]", description="Attack an enemy")
+        register("inventory", lambda player: player.show_inventory(), aliases=("i",), description="Show inventory")
+        register("status", lambda player: player.show_status(), description="Show player status")
+        # Saving, loading and quitting must be typed in full
+        register("save", lambda player: self.save_game(), description="Save game", abbreviate=False)
+        register("load", lambda player: self.load_game(), description="Load game", abbreviate=False)
+        register("help", self.show_help, aliases=("?",), description="Show commands")
+        register("quit", self.quit, aliases=("exit",), description="Exit game", abbreviate=False)
+        for direction in ("north", "south", "east", "west"):
+            self.commands.shortcut(direction, "go", direction)
+            self.commands.shortcut(direction[0], "go", direction)
 
     def setup_game(self):
         # Create items
@@ -2556,9 +5124,10 @@ class Game:
         armory.add_item(sword)
         armory.add_item(shield)
         treasury.add_item(treasure)
-        treasury.add_enemy(goblin)
-        dungeon.add_enemy(skeleton)
-        dungeon.add_enemy(troll)
+        self.next_enemy_id = 0  # A fresh world numbers its enemies from 0
+        self.spawn(treasury, goblin)
+        self.spawn(dungeon, skeleton)
+        self.spawn(dungeon, troll)
 
         self.rooms = {
             "entrance": entrance,
@@ -2567,26 +5136,124 @@ class Game:
             "dungeon": dungeon
         }
 
+    # Ids tell apart enemies of the same kind, so each draws from its own
+    # stream whichever order fights happen in. They are saved with the world.
+    def identify(self, enemy: Enemy) -> int:
+        if enemy.id is None:
+            enemy.id = self.next_enemy_id
+            self.next_enemy_id += 1
+        return enemy.id
+
+    def spawn(self, room: Room, enemy: Enemy) -> Enemy:
+        self.identify(enemy)
+        room.add_enemy(enemy)
+        return enemy
+
+    def player_attack(self, player: Player, enemy: Enemy) -> bool:
+        damage = self.rng.stream(f"player/{player.name}").randint(player.attack_power - 5, player.attack_power + 5)
+        if enemy.take_damage(damage):
+            print(f"\n{enemy.name} defeated!")
+            player.gain_experience(enemy.exp_reward)
+            player.gold += enemy.gold_reward
+            print(f"Earned {enemy.gold_reward} gold!")
+            return True
+        return False
+
+    def enemy_attack(self, enemy: Enemy, player: Player):
+        damage = self.rng.stream(f"enemy/{self.identify(enemy)}").randint(enemy.attack - 3, enemy.attack + 3)
+        player.take_damage(damage)
+
     def combat(self, player: Player, enemy: Enemy):
         print(f"\nCombat begins: {player.name} vs {enemy.name}!")
         while enemy.health > 0 and player.health > 0:
             # Player's turn
-            damage = random.randint(player.attack_power - 5, player.attack_power + 5)
-            if enemy.take_damage(damage):
-                print(f"\n{enemy.name} defeated!")
-                player.gain_experience(enemy.exp_reward)
-                player.gold += enemy.gold_reward
-                print(f"Earned {enemy.gold_reward} gold!")
+            if self.player_attack(player, enemy):
                 return True
-            time.sleep(1)
+            self.pause()
 
             # Enemy's turn
-            damage = random.randint(enemy.attack - 3, enemy.attack + 3)
-            player.take_damage(damage)
-            time.sleep(1)
+            self.enemy_attack(enemy, player)
+            self.pause()
         return False
 
-    def save_game(self, filename: str = "savegame.json"):
+    def pause(self):
+        # Shows the combat so far before waiting out the turn
+        if self.turn_delay:
+            sys.stdout.flush()
+            time.sleep(self.turn_delay)
+
+    # Command actions shared by the input loop and other front ends (e.g. the
+    # network server); each acts on the given player only.
+    def move(self, player: Player, direction: str) -> bool:
+        if direction in player.current_room.exits:
+            player.current_room = player.current_room.exits[direction]
+            return True
+        print("\nCan't go that way!")
+        return False
+
+    def take(self, player: Player, item_name: str) -> bool:
+        item = player.current_room.remove_item(item_name)
+        if item:
+            player.add_item(item)
+            if item.name == "Shield":
+                player.armor += 5
+            return True
+        print("\nNo such item in the room!")
+        return False
+
+    def use(self, player: Player, item_name: str) -> bool:
+        item = player.remove_item(item_name)
+        if item:
+            if item.name == "Health Potion":
+                player.heal(30)
+                return True
+            print("\nCan't use that item!")
+            player.add_item(item)
+        else:
+            print("\nNo such item in inventory!")
+        return False
+
+    def attack(self, player: Player, enemy_name: str) -> bool:
+        enemy = self.find_enemy(player.current_room, enemy_name)
+        if enemy is None:
+            print("\nNo such enemy in the room!")
+            return False
+        if self.combat(player, enemy):
+            player.current_room.enemies.remove(enemy)
+            return True
+        return False
+
+    def show_help(self, player: Player):
+        print("\nCommands:")
+        for line in self.commands.help_lines():
+            print(line)
+
+    def quit(self, player: Player):
+        print("\nThanks for playing!")
+        self.running = False
+
+    def unknown_command(self, player: Player, word: str, matches: List[str]):
+        if len(matches) > 1:
+            print(f"\n'{word}' could mean: {', '.join(matches)}")
+        else:
+            print("\nUnknown command! Type 'help' for commands.")
+
+    def command_usage(self, player: Player, command: Command):
+        print(f"\nUsage: {command.usage}")
+
+    def find_enemy(self, room: Room, enemy_name: str) -> Optional[Enemy]:
+        for enemy in room.enemies:
+            if enemy.name.lower() == enemy_name.lower():
+                return enemy
+        return None
+
+    def save_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
+        if codec is not None:
+            # The whole world, in one of savefile.CODECS ("json", "zlib", "lzma", "raw")
+            from savefile import save_world
+            save_world(self, filename, codec)
+            print(f"\nGame saved to {filename}")
+            return
         save_data = {
             "player": {
                 "name": self.player.name,
@@ -2596,42 +5263,59 @@ class Game:
                 "inventory": [{"name": item.name, "description": item.description, 
                              "value": item.value, "damage": item.damage} 
                             for item in self.player.inventory],
-                "current_room": self.player.current_room.name,
+                # The room's key in self.rooms, which load_game looks it up by
+                "current_room": next(key for key, room in self.rooms.items()
+                                     if room is self.player.current_room),
                 "attack_power": self.player.attack_power,
                 "armor": self.player.armor,
                 "level": self.player.level,
                 "experience": self.player.experience,
                 "exp_to_next_level": self.player.exp_to_next_level
-            }
+            },
+            "rng": self.rng.state()
         }
         with open(filename, 'w') as f:
             json.dump(save_data, f, indent=2)
         print(f"\nGame saved to {filename}")
 
-    def load_game(self, filename: str = "savegame.json"):
+    def load_game(self, filename: str = "savegame.json", codec: Optional[str] = None):
         try:
+            with open(filename, 'rb') as f:
+                head = f.read(11)
+            # Binary worlds start with their magic, JSON worlds with their version key
+            world = head.startswith(b"DGSV") or head == b'{"version":'
+            if world or codec is not None:
+                # A world saved by save_game(codec=...)
+                from savefile import load_world
+                load_world(filename, self)
+                print(f"\nGame loaded from {filename}")
+                return True
             with open(filename, 'r') as f:
                 save_data = json.load(f)
             
-            self.player = Player(save_data["player"]["name"])
-            self.player.health = save_data["player"]["health"]
-            self.player.max_health = save_data["player"]["max_health"]
-            self.player.gold = save_data["player"]["gold"]
-            self.player.attack_power = save_data["player"]["attack_power"]
-            self.player.armor = save_data["player"]["armor"]
-            self.player.level = save_data["player"]["level"]
-            self.player.experience = save_data["player"]["experience"]
-            self.player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
+            # Built aside and swapped in at the end, so a bad save leaves the game as it was
+            player = Player(save_data["player"]["name"])
+            player.health = save_data["player"]["health"]
+            player.max_health = save_data["player"]["max_health"]
+            player.gold = save_data["player"]["gold"]
+            player.attack_power = save_data["player"]["attack_power"]
+            player.armor = save_data["player"]["armor"]
+            player.level = save_data["player"]["level"]
+            player.experience = save_data["player"]["experience"]
+            player.exp_to_next_level = save_data["player"]["exp_to_next_level"]
             
             for item_data in save_data["player"]["inventory"]:
-                self.player.inventory.append(Item(
+                player.inventory.append(Item(
                     item_data["name"],
                     item_data["description"],
                     item_data["value"],
                     item_data.get("damage", 0)
                 ))
             
-            self.player.current_room = self.rooms[save_data["player"]["current_room"]]
+            player.current_room = self.rooms[save_data["player"]["current_room"]]
+            self.player = player
+            if "rng" in save_data:
+                self.rng.restore(save_data["rng"])
             print(f"\nGame loaded from {filename}")
         except FileNotFoundError:
             print("\nNo save file found!")
@@ -2647,82 +5331,22 @@ class Game:
         self.running = True
         print("\nType 'help' for commands.")
 
+        output = BufferedOutput(sys.stdout)
         while self.running:
-            self.player.current_room.describe()
-            command = input("\nWhat do you want to do? ").strip().lower().split()
-            if not command:
-                continue
-
-            action = command[0]
-            args = command[1:] if len(command) > 1 else []
-
-            if action == "go" and args:
-                direction = args[0]
-                if direction in self.player.current_room.exits:
-                    self.player.current_room = self.player.current_room.exits[direction]
-                else:
-                    print("\nCan't go that way!")
-            
-            elif action == "take" and args:
-                item_name = " ".join(args)
-                item = self.player.current_room.remove_item(item_name)
-                if item:
-                    self.player.add_item(item)
-                    if item.name == "Shield":
-                        self.player.armor += 5
-                else:
-                    print("\nNo such item in the room!")
-            
-            elif action == "use" and args:
-                item_name = " ".join(args)
-                item = self.player.remove_item(item_name)
-                if item:
-                    if item.name == "Health Potion":
-                        self.player.heal(30)
-                    else:
-                        print("\nCan't use that item!")
-                        self.player.add_item(item)
-                else:
-                    print("\nNo such item in inventory!")
-            
-            elif action == "attack" and args:
-                enemy_name = " ".join(args)
-                for enemy in self.player.current_room.enemies:
-                    if enemy.name.lower() == enemy_name.lower():
-                        if self.combat(self.player, enemy):
-                            self.player.current_room.enemies.remove(enemy)
-                        break
-                else:
-                    print("\nNo such enemy in the room!")
-            
-            elif action == "inventory":
-                self.player.show_inventory()
-            
-            elif action == "status":
-                self.player.show_status()
-            
-            elif action == "save":
-                self.save_game()
-            
-            elif action == "load":
-                self.load_game()
-            
-            elif action == "help":
-                print("\nCommands:")
-                print("go [direction] - Move to another room")
-                print("take [item] - Pick up an item")
-                print("use [item] - Use an item")
-                print("attack [enemy] - Attack an enemy")
-                print("inventory - Show inventory")
-                print("status - Show player status")
-                print("save - Save game")
-                print("load - Load game")
-                print("quit - Exit game")
-            
-            elif action == "quit":
-                print("\nThanks for playing!")
-                self.running = False
-            
-            else:
-                print("\nUnknown command! Type 'help' for commands.")
+            # The last command's output, the room and the prompt go out in one write
+            output.write(f"\n{self.player.current_room.render()}\n")
+            line = input(output.drain() + "\nWhat do you want to do? ")
+            if self.simulation is not None:
+                self.simulation.catch_up()  # Apply the ticks that passed while waiting for input
+            try:
+                with contextlib.redirect_stdout(output):
+                    self.handle(line)
+            except SystemExit:
+                output.flush()
+                raise
+        output.flush()
+
+    # Runs one line of input for self.player
+    def handle(self, line: str):
+        self.commands.dispatch(self.player, line)
 
@@ -1,10 +1,11 @@
-import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -42,101 +43,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -148,10 +104,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -165,10 +118,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -187,16 +137,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -221,15 +173,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -346,13 +294,14 @@ def main():
 if __name__ == "__main__":
     main()
 
-import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -390,101 +339,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -496,10 +400,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -513,10 +414,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -535,16 +433,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -569,15 +469,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -694,13 +590,14 @@ def main():
 if __name__ == "__main__":
     main()
 
-    import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -738,101 +635,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -844,10 +696,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -861,10 +710,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -883,16 +729,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -917,15 +765,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -1042,13 +886,14 @@ def main():
 if __name__ == "__main__":
     main()
 
-    import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -1086,101 +931,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -1192,10 +992,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -1209,10 +1006,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -1231,16 +1025,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -1265,15 +1061,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -1390,13 +1182,14 @@ def main():
 if __name__ == "__main__":
     main()
 
-    import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -1434,101 +1227,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -1540,10 +1288,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -1557,10 +1302,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -1579,16 +1321,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -1613,15 +1357,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -1738,13 +1478,14 @@ def main():
 if __name__ == "__main__":
     main()
 
-    import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -1782,101 +1523,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -1888,10 +1584,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -1905,10 +1598,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -1927,16 +1617,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -1961,15 +1653,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -2086,13 +1774,14 @@ def main():
 if __name__ == "__main__":
     main()
 
-    import sqlite3
 import datetime
 from typing import List, Dict, Optional
 import re
 import json
 import os
 
+import dao
+
 class Book:
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
@@ -2130,101 +1819,56 @@ class Transaction:
         return f"Transaction {self.transaction_id}: Book {self.book_isbn} by Member {self.member_id} ({status})"
 
 class Library:
-    def __init__(self, db_name: str = "library.db"):
+    def __init__(self, db_name: str = "library.db", cached_statements: int = dao.STATEMENT_CACHE_SIZE):
         self.db_name = db_name
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
+        self.conn = dao.connect(db_name, cached_statements)
+        self.store = dao.LibraryStore(self.conn)
         self.initialize_database()
         self.books: Dict[str, Book] = {}
         self.members: Dict[str, Member] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.listeners: List = []  # Subsystems notified via on_borrow/on_return
+        self.last_transaction_number = 0
         self.load_data()
 
     def initialize_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS books (
-                isbn TEXT PRIMARY KEY,
-                title TEXT,
-                author TEXT,
-                year INTEGER,
-                copies INTEGER,
-                available_copies INTEGER
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS members (
-                member_id TEXT PRIMARY KEY,
-                name TEXT,
-                email TEXT,
-                fines REAL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id TEXT PRIMARY KEY,
-                book_isbn TEXT,
-                member_id TEXT,
-                borrow_date TEXT,
-                return_date TEXT,
-                fine REAL,
-                FOREIGN KEY(book_isbn) REFERENCES books(isbn),
-                FOREIGN KEY(member_id) REFERENCES members(member_id)
-            )
-        ''')
+        self.store.create_schema()
         self.conn.commit()
 
     def load_data(self):
         # Load books
-        self.cursor.execute("SELECT * FROM books")
-        for row in self.cursor.fetchall():
-            book = Book(row[0], row[1], row[2], row[3], row[4], row[5])
+        for row in self.store.books():
+            book = Book(row[0], row[1], row[2], row[3], row[4])
+            book.available_copies = row[5]
             self.books[row[0]] = book
 
         # Load members
-        self.cursor.execute("SELECT * FROM members")
-        for row in self.cursor.fetchall():
+        for row in self.store.members():
             member = Member(row[0], row[1], row[2])
             member.fines = row[3]
             self.members[row[0]] = member
 
         # Load transactions
-        self.cursor.execute("SELECT * FROM transactions")
-        for row in self.cursor.fetchall():
+        for row in self.store.transactions():
             transaction = Transaction(row[0], row[1], row[2], row[3])
             transaction.return_date = row[4]
             transaction.fine = row[5]
             self.transactions[row[0]] = transaction
+            self.last_transaction_number = max(self.last_transaction_number, int(row[0][1:]))
+            # available_copies was loaded as persisted; open loans are already counted in it
             if not transaction.return_date:
-                if row[1] in self.books:
-                    self.books[row[1]].available_copies -= 1
                 if row[2] in self.members:
                     self.members[row[2]].borrowed_books.append(row[1])
 
     def save_data(self):
-        # Save books
-        self.cursor.execute("DELETE FROM books")
-        for book in self.books.values():
-            self.cursor.execute('''
-                INSERT INTO books (isbn, title, author, year, copies, available_copies)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (book.isbn, book.title, book.author, book.year, book.copies, book.available_copies))
-
-        # Save members
-        self.cursor.execute("DELETE FROM members")
-        for member in self.members.values():
-            self.cursor.execute('''
-                INSERT INTO members (member_id, name, ascended, fines)
-                VALUES (?, ?, ?, ?)
-            ''', (member.member_id, member.name, member.email, member.fines))
-
-        # Save transactions
-        self.cursor.execute("DELETE FROM transactions")
-        for transaction in self.transactions.values():
-            self.cursor.execute('''
-                INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (transaction.transaction_id, transaction.book_isbn, transaction.member_id,
-                  transaction.borrow_date, transaction.return_date, transaction.fine))
+        self.store.replace_all(
+            ((book.isbn, book.title, book.author, book.year, book.copies, book.available_copies)
+             for book in self.books.values()),
+            ((member.member_id, member.name, member.email, member.fines)
+             for member in self.members.values()),
+            ((transaction.transaction_id, transaction.book_isbn, transaction.member_id,
+              transaction.borrow_date, transaction.return_date, transaction.fine)
+             for transaction in self.transactions.values()))
         self.conn.commit()
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int):
@@ -2236,10 +1880,7 @@ class Library:
             return False
         book = Book(isbn, title, author, year, copies)
         self.books[isbn] = book
-        self.cursor.execute('''
-            INSERT INTO books (isbn, title, author, year, copies, available_copies)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (isbn, title, author, year, copies, copies))
+        self.store.insert_book(isbn, title, author, year, copies, copies)
         self.conn.commit()
         print(f"\nBook '{title}' added successfully!")
         return True
@@ -2253,10 +1894,7 @@ class Library:
             return False
         member = Member(member_id, name, email)
         self.members[member_id] = member
-        self.cursor.execute('''
-            INSERT INTO members (member_id, name, email, fines)
-            VALUES (?, ?, ?, ?)
-        ''', (member_id, name, email, 0.0))
+        self.store.insert_member(member_id, name, email)
         self.conn.commit()
         print(f"\nMember '{name}' added successfully!")
         return True
@@ -2275,16 +1913,18 @@ class Library:
             print("\nMember has reached borrowing limit (3 books)!")
             return False
 
-        transaction_id = f"T{len(self.transactions) + 1:05d}"
+        # Archived transactions leave self.transactions, so its size cannot be used as the next ID
+        self.last_transaction_number += 1
+        transaction_id = f"T{self.last_transaction_number:05d}"
         borrow_date = datetime.datetime.now().strftime("%Y-%m-%d")
         transaction = Transaction(transaction_id, isbn, member_id, borrow_date)
         self.transactions[transaction_id] = transaction
         self.books[isbn].available_copies -= 1
         self.members[member_id].borrowed_books.append(isbn)
-        self.cursor.execute('''
-            INSERT INTO transactions (transaction_id, book_isbn, member_id, borrow_date, return_date, fine)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (transaction_id, isbn, member_id, borrow_date, None, 0.0))
+        self.store.insert_transaction(transaction_id, isbn, member_id, borrow_date)
+        self.store.set_available(isbn, self.books[isbn].available_copies)
+        for listener in self.listeners:
+            listener.on_borrow(transaction)
         self.conn.commit()
         print(f"\nBook '{self.books[isbn].title}' borrowed by {self.members[member_id].name}!")
         return True
@@ -2309,15 +1949,11 @@ class Library:
         self.books[book_isbn].available_copies += 1
         self.members[member_id].borrowed_books.remove(book_isbn)
         self.members[member_id].fines += fine
-        self.cursor.execute('''
-            UPDATE transactions SET return_date = ?, fine = ? WHERE transaction_id = ?
-        ''', (transaction.return_date, fine, transaction_id))
-        self.cursor.execute('''
-            UPDATE books SET available_copies = ? WHERE isbn = ?
-        ''', (self.books[book_isbn].available_copies, book_isbn))
-        self.cursor.execute('''
-            UPDATE members SET fines = ? WHERE member_id = ?
-        ''', (self.members[member_id].fines, member_id))
+        self.store.set_returned(transaction_id, transaction.return_date, fine)
+        self.store.set_available(book_isbn, self.books[book_isbn].available_copies)
+        self.store.set_fines(member_id, self.members[member_id].fines)
+        for listener in self.listeners:
+            listener.on_return(transaction)
         self.conn.commit()
         print(f"\nBook returned! Fine: ${fine:.2f}")
         return True
@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from oplog import OperationLog, read_events, replay
+from testing2 import Library
+
+def test_torn_tail_is_cut_before_the_next_append(tmp_path):
+    log_path = str(tmp_path / "library.oplog")
+    library = Library(str(tmp_path / "library.db"))
+    log = OperationLog(library, log_path)
+    library.add_book("9780000000001", "Title", "Author", 2000, 2)
+    library.add_member("M1", "Ann", "ann@example.com")
+    log.close()
+    with open(log_path, "ab") as f:
+        f.write(b"3\t1700000000.000\tM\tM9\tTorn")  # Crash mid-append: no newline
+
+    library.conn.close()
+    library = Library(str(tmp_path / "library.db"))  # Restart after the crash
+    log = OperationLog(library, log_path)
+    assert log.seq == 2
+    library.add_member("M2", "Bob", "bob@example.com")
+    log.close()
+    library.conn.close()
+
+    events = list(read_events(log_path))
+    assert [fields[0] for fields in events] == ["1", "2", "3"]
+    assert events[2][3:] == ["M2", "Bob", "bob@example.com"]
+    stats = replay(log_path, str(tmp_path / "replica.db"))
+    assert stats["seq"] == 3
+    conn = sqlite3.connect(str(tmp_path / "replica.db"))
+    assert [row[0] for row in conn.execute("SELECT member_id FROM members ORDER BY member_id")] == ["M1", "M2"]
+    conn.close()
+
+def test_log_without_a_complete_line_starts_over(tmp_path):
+    log_path = str(tmp_path / "library.oplog")
+    with open(log_path, "wb") as f:
+        f.write(b"1\t1700000000.000\tM\tM")
+    library = Library(str(tmp_path / "library.db"))
+    log = OperationLog(library, log_path)
+    assert log.seq == 0
+    library.add_member("M1", "Ann", "ann@example.com")
+    log.close()
+    library.conn.close()
+    assert [fields[0] for fields in read_events(log_path)] == ["1"]
@@ -0,0 +1,47 @@
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from replay import SessionRecorder, SessionReplayer, state_hash
+from testing import Game, Player
+
+def _record(log_path: str, lines, restore_after: int = -1):
+    # Plays lines into a recorded game, restoring the random streams (as a
+    # load does) after the first `restore_after` of them
+    game = Game(seed=7)
+    game.turn_delay = 0
+    game.setup_game()
+    game.player = Player("tester")
+    game.player.current_room = game.rooms["entrance"]
+    recorder = SessionRecorder(game, log_path)
+    output = io.StringIO()
+    with redirect_stdout(output):
+        for index, line in enumerate(lines):
+            if index == restore_after:
+                game.rng.restore(game.rng.state())
+            game.handle(line)
+    recorder.close()
+    return game, output.getvalue()
+
+def _log_lines(log_path: str, kind: str):
+    with open(log_path, encoding="utf-8") as f:
+        return [line for line in f if line.startswith(kind + " ")]
+
+def test_draws_after_a_restore_are_logged_and_replay(tmp_path):
+    log_path = str(tmp_path / "session.log")
+    fights = ["go east", "attack goblin"]
+    _record(str(tmp_path / "plain.log"), fights)
+    game, _ = _record(log_path, fights + ["go west", "go north", "go east", "attack skeleton"], restore_after=2)
+
+    assert len(_log_lines(log_path, "r")) > len(_log_lines(str(tmp_path / "plain.log"), "r"))
+    assert state_hash(SessionReplayer(log_path).run()) == state_hash(game)
+
+def test_load_is_refused_while_recording(tmp_path):
+    log_path = str(tmp_path / "session.log")
+    _, output = _record(log_path, ["go east", "load"])
+
+    assert "Loading is disabled" in output
+    assert _log_lines(log_path, "c") == ["c go east\n"]
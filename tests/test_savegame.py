@@ -0,0 +1,52 @@
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from testing import Game, Player
+
+def _game() -> Game:
+    game = Game(seed=1)
+    game.turn_delay = 0
+    game.setup_game()
+    game.player = Player("tester")
+    game.player.current_room = game.rooms["entrance"]
+    return game
+
+def test_player_save_round_trips(tmp_path):
+    path = str(tmp_path / "s.json")
+    game = _game()
+    with redirect_stdout(io.StringIO()):
+        game.handle("go east")
+        game.handle("attack goblin")
+        game.save_game(path)
+        loaded = _game()
+        assert loaded.load_game(path)
+
+    assert loaded.player.current_room is loaded.rooms["treasury"]
+    assert (loaded.player.health, loaded.player.gold, loaded.player.experience) == \
+        (game.player.health, game.player.gold, game.player.experience)
+    assert loaded.rng.state() == game.rng.state()
+
+def test_failed_load_leaves_the_game_unchanged(tmp_path):
+    path = str(tmp_path / "s.json")
+    game = _game()
+    with redirect_stdout(io.StringIO()):
+        game.save_game(path)
+    with open(path) as f:
+        data = json.load(f)
+    data["player"]["current_room"] = "nowhere"
+    data["rng"]["seed"] = 2
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+    player, rng_state = game.player, game.rng.state()
+    with pytest.raises(KeyError):
+        game.load_game(path)
+    assert game.player is player
+    assert game.rng.state() == rng_state
@@ -0,0 +1,51 @@
+import random
+from typing import Optional
+
+from testing import Game, Item, Enemy, Room
+
+NOUNS = ["Corridor", "Hall", "Cellar", "Crypt", "Gallery", "Vault", "Chamber", "Passage", "Grotto", "Shrine"]
+ADJECTIVES = ["Dusty", "Flooded", "Silent", "Crumbling", "Narrow", "Echoing", "Mossy", "Frozen", "Gloomy", "Ancient"]
+ENEMIES = [("Goblin", 30, 5, 20, 10), ("Skeleton", 40, 8, 30, 15), ("Troll", 60, 12, 50, 25),
+           ("Rat", 10, 2, 5, 1), ("Bandit", 35, 7, 25, 20)]
+ITEMS = [("Health Potion", "Restores 30 HP", 20, 0), ("Sword", "A sharp steel blade", 50, 10),
+         ("Shield", "Increases armor by 5", 40, 0), ("Gold Coin", "A single gold coin", 1, 0)]
+
+# Builds a width x height grid of rooms joined north/south/east/west, with a
+# fraction of the links walled off so paths are not all straight lines. Room
+# (0, 0) is keyed "entrance" like setup_game's; the rest are "room_<x>_<y>".
+# Room names are unique so saves can refer to rooms by name.
+def generate_world(width: int, height: int, enemy_chance: float = 0.2, item_chance: float = 0.1,
+                   wall_chance: float = 0.1, seed: int = 42, game: Optional[Game] = None) -> Game:
+    rng = random.Random(seed)
+    game = game or Game()
+    game.next_enemy_id = 0
+    grid = []
+    rooms = {}
+    for y in range(height):
+        row = []
+        for x in range(width):
+            key = "entrance" if x == 0 and y == 0 else f"room_{x}_{y}"
+            name = "Entrance Hall" if key == "entrance" else f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {x},{y}"
+            room = Room(name, f"A {name.split()[0].lower()} part of the dungeon.")
+            if rng.random() < enemy_chance:
+                game.spawn(room, Enemy(*rng.choice(ENEMIES)))
+            if rng.random() < item_chance:
+                room.add_item(Item(*rng.choice(ITEMS)))
+            rooms[key] = room
+            row.append(room)
+        grid.append(row)
+    for y in range(height):
+        for x in range(width):
+            room = grid[y][x]
+            west = x > 0 and (y == 0 or rng.random() >= wall_chance)
+            north = y > 0 and (x == 0 or rng.random() >= wall_chance)
+            if x > 0 and y > 0 and not west and not north:
+                west = True  # Every room keeps a link toward the entrance
+            if west:
+                room.add_exit("west", grid[y][x - 1])
+                grid[y][x - 1].add_exit("east", room)
+            if north:
+                room.add_exit("north", grid[y - 1][x])
+                grid[y - 1][x].add_exit("south", room)
+    game.rooms = rooms
+    return game